@@ -1,64 +1,157 @@
 import datetime
 import random
+from collections import namedtuple
+
+# Traffic levels drawn for each connection
+TRAFFIC_LEVELS = ('low', 'moderate', 'high')
+
+# Time bucket that traffic is drawn for: one calendar day split into
+# rush hour and off-peak
+TrafficEpoch = namedtuple('TrafficEpoch', ['day', 'weekend', 'rush_hour'])
+
+# Most non-dominated partial routes kept per city by the Pareto search. Past
+# the cap the frontier is approximate: the fastest and the cheapest route to
+# every city are always kept, the other slots go to the most comfortable ones
+MAX_PARETO_LABELS = 4
 
 
 class MinHeap:
-    """Custom implementation of a min heap data structure."""
-    
-    def __init__(self):
-        self.heap = []
-    
-    def push(self, item):
-        """Add item to the heap and maintain the heap property."""
-        self.heap.append(item)
-        self._sift_up(len(self.heap) - 1)
-    
+    """Position-indexed d-ary min heap with decrease-key.
+
+    Entries are (key, priority) pairs with unique, hashable keys. The heap
+    tracks the slot of every key, so decrease_key runs in O(log n) without
+    pushing duplicate entries. Sifting is iterative, and the arity can be
+    raised (e.g. 4) to trade slightly more comparisons per level for a
+    shallower tree.
+    """
+
+    def __init__(self, arity=2):
+        if arity < 2:
+            raise ValueError("Heap arity must be at least 2")
+        self.arity = arity
+        self._keys = []
+        self._priorities = []
+        self._positions = {}  # key -> index in _keys/_priorities
+
+    def push(self, key, priority):
+        """Add a key with the given priority."""
+        if key in self._positions:
+            raise KeyError(f"Key {key!r} is already in the heap")
+        self._keys.append(key)
+        self._priorities.append(priority)
+        self._sift_up(len(self._keys) - 1, key, priority)
+
     def pop(self):
-        """Remove and return the smallest item from the heap."""
-        if not self.heap:
+        """Remove and return the (key, priority) pair with the smallest priority."""
+        keys = self._keys
+        if not keys:
             return None
-        
-        # Swap the root with the last element
-        self._swap(0, len(self.heap) - 1)
-        item = self.heap.pop()
-        
-        # Restore the heap property
-        if self.heap:
-            self._sift_down(0)
-        
-        return item
-    
-    def _sift_up(self, index):
-        """Move an item up the heap to maintain the heap property."""
-        parent = (index - 1) // 2
-        
-        if index > 0 and self.heap[parent][0] > self.heap[index][0]:
-            self._swap(index, parent)
-            self._sift_up(parent)
-    
-    def _sift_down(self, index):
-        """Move an item down the heap to maintain the heap property."""
-        smallest = index
-        left = 2 * index + 1
-        right = 2 * index + 2
-        
-        if left < len(self.heap) and self.heap[left][0] < self.heap[smallest][0]:
-            smallest = left
-            
-        if right < len(self.heap) and self.heap[right][0] < self.heap[smallest][0]:
-            smallest = right
-            
-        if smallest != index:
-            self._swap(index, smallest)
-            self._sift_down(smallest)
-    
-    def _swap(self, i, j):
-        """Swap two items in the heap."""
-        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
-    
+
+        priorities = self._priorities
+        key = keys[0]
+        priority = priorities[0]
+        del self._positions[key]
+
+        # Move the last entry to the root and restore the heap property
+        last_key = keys.pop()
+        last_priority = priorities.pop()
+        if keys:
+            self._sift_down(0, last_key, last_priority)
+        return key, priority
+
+    def peek(self):
+        """Return the (key, priority) pair with the smallest priority without removing it."""
+        if not self._keys:
+            return None
+        return self._keys[0], self._priorities[0]
+
+    def decrease_key(self, key, priority):
+        """Lower the priority of a key already in the heap.
+
+        Returns False, leaving the heap untouched, if the new priority is not lower.
+        """
+        index = self._positions[key]
+        if priority >= self._priorities[index]:
+            return False
+        self._sift_up(index, key, priority)
+        return True
+
+    def push_or_decrease(self, key, priority):
+        """Push a new key, or lower its priority if it is already queued."""
+        if key in self._positions:
+            return self.decrease_key(key, priority)
+        self.push(key, priority)
+        return True
+
+    def priority(self, key):
+        """Return the current priority of a queued key."""
+        return self._priorities[self._positions[key]]
+
+    def _sift_up(self, index, key, priority):
+        """Move an entry up from index until its parent is not larger."""
+        keys = self._keys
+        priorities = self._priorities
+        positions = self._positions
+        arity = self.arity
+
+        while index > 0:
+            parent = (index - 1) // arity
+            parent_priority = priorities[parent]
+            if parent_priority <= priority:
+                break
+            # Shift the parent down instead of swapping on every level
+            parent_key = keys[parent]
+            keys[index] = parent_key
+            priorities[index] = parent_priority
+            positions[parent_key] = index
+            index = parent
+
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
+
+    def _sift_down(self, index, key, priority):
+        """Move an entry down from index until no child is smaller."""
+        keys = self._keys
+        priorities = self._priorities
+        positions = self._positions
+        arity = self.arity
+        size = len(keys)
+
+        while True:
+            first_child = index * arity + 1
+            if first_child >= size:
+                break
+
+            # Find the smallest child
+            smallest = first_child
+            smallest_priority = priorities[first_child]
+            for child in range(first_child + 1, min(first_child + arity, size)):
+                if priorities[child] < smallest_priority:
+                    smallest = child
+                    smallest_priority = priorities[child]
+
+            if smallest_priority >= priority:
+                break
+            child_key = keys[smallest]
+            keys[index] = child_key
+            priorities[index] = smallest_priority
+            positions[child_key] = index
+            index = smallest
+
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
+
     def is_empty(self):
         """Check if the heap is empty."""
-        return len(self.heap) == 0
+        return not self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions
 
 
 class City:
@@ -66,6 +159,7 @@ class City:
     
     def __init__(self, name):
         self.name = name
+        self.city_id = None  # Assigned by CityRegistry
         self.connections = []  # List of (destination, comfort, cost, duration)
         self.next_city = None
     
@@ -78,11 +172,111 @@ class City:
         return True
 
 
+class CityRegistry:
+    """Hash-indexed store of cities with stable insertion order and integer IDs."""
+
+    def __init__(self):
+        self._cities = []  # City objects indexed by city_id
+        self._index = {}  # casefolded name -> City
+
+    @staticmethod
+    def normalize(name):
+        """Return the lookup key used for a city name."""
+        return name.casefold()
+
+    def add(self, city):
+        """Register a city, assigning it the next integer ID.
+
+        Returns the city, or None if a city with the same name already exists.
+        """
+        key = self.normalize(city.name)
+        if key in self._index:
+            return None
+
+        city.city_id = len(self._cities)
+        self._cities.append(city)
+        self._index[key] = city
+        return city
+
+    def get(self, name):
+        """Get a city by name (case-insensitive) in O(1)."""
+        return self._index.get(self.normalize(name))
+
+    def get_by_id(self, city_id):
+        """Get a city by its integer ID."""
+        return self._cities[city_id]
+
+    def names(self):
+        """Return all city names in insertion order."""
+        return [city.name for city in self._cities]
+
+    def __iter__(self):
+        return iter(self._cities)
+
+    def __len__(self):
+        return len(self._cities)
+
+
+class TrafficModel:
+    """Seedable traffic model that fixes every connection's traffic level per epoch.
+
+    Levels are drawn once per (epoch, network version) from an RNG seeded with
+    the model seed and the epoch, so the same query in the same time bucket
+    always sees the same traffic.
+    """
+
+    def __init__(self, seed=0, clock=datetime.datetime.now):
+        self.seed = seed
+        self.clock = clock
+        self._cached_key = None
+        self._cached_levels = None
+
+    def current_epoch(self, now=None):
+        """Return the epoch for a datetime (defaults to the model clock)."""
+        if now is None:
+            now = self.clock()
+        weekend = now.weekday() in [5, 6]
+        is_rush_hour = 7 <= now.hour <= 9 or 17 <= now.hour <= 19
+        return TrafficEpoch(now.date().isoformat(), weekend, is_rush_hour)
+
+    @staticmethod
+    def conditions(epoch):
+        """Traffic factors based on time of day and weekday/weekend."""
+        return {
+            'low': 0.8 if not epoch.weekend else 0.9,
+            'moderate': 1.0 if not epoch.weekend else 1.1,
+            'high': 1.3 if not epoch.rush_hour else 1.6
+        }
+
+    @staticmethod
+    def weekend_discount(epoch):
+        """Price multiplier applied to every segment during the epoch."""
+        return 0.9 if epoch.weekend else 1.0
+
+    def connection_traffic(self, transport, epoch):
+        """Return per-city lists of traffic levels aligned with City.connections."""
+        key = (epoch, transport.version)
+        if key != self._cached_key:
+            rng = random.Random(f"{self.seed}:{epoch.day}:{epoch.weekend}:{epoch.rush_hour}")
+            self._cached_levels = [
+                [TRAFFIC_LEVELS[int(rng.random() * len(TRAFFIC_LEVELS))] for _ in city.connections]
+                for city in transport.registry
+            ]
+            self._cached_key = key
+        return self._cached_levels
+
+
 class TransportSystem:
     """Manages a linked list of cities and routes between them."""
     
     def __init__(self):
         self.head = None
+        self.tail = None
+        self.registry = CityRegistry()
+        self.version = 0  # Bumped whenever cities or routes change
+        self.traffic = TrafficModel()
+        self._neighbors_key = None  # (epoch, version) the resolved neighbours are for
+        self._neighbors = None
         self.comfort_levels = {
             'Economy': {'price_factor': 1.0, 'satisfaction': 'Basic comfort', 'comfort_score': 1},
             'Standard': {'price_factor': 1.3, 'satisfaction': 'Comfortable journey', 'comfort_score': 2},
@@ -92,18 +286,18 @@ class TransportSystem:
         
     def add_city(self, name):
         """Add a city to the transport system."""
-        # Check if city already exists
-        if self.get_city(name):
+        # Registering fails if the city already exists
+        city = self.registry.add(City(name))
+        if not city:
             return False
-            
-        city = City(name)
+
+        # Keep the linked list for callers that walk head/next_city
         if not self.head:
             self.head = city
         else:
-            temp = self.head
-            while temp.next_city:
-                temp = temp.next_city
-            temp.next_city = city
+            self.tail.next_city = city
+        self.tail = city
+        self.version += 1
         return True
 
     def add_route(self, start, end, comfort, cost, duration):
@@ -115,260 +309,361 @@ class TransportSystem:
             return False
             
         # Add bidirectional connection
-        origin.add_connection(end, comfort, cost, duration)
-        destination.add_connection(start, comfort, cost, duration)
+        added_out = origin.add_connection(end, comfort, cost, duration)
+        added_back = destination.add_connection(start, comfort, cost, duration)
+        if added_out or added_back:
+            self.version += 1
         return True
 
     def get_city(self, name):
         """Get a city by name."""
-        temp = self.head
-        while temp:
-            if temp.name.lower() == name.lower():
-                return temp
-            temp = temp.next_city
-        return None
+        return self.registry.get(name)
+
+    def city_names(self):
+        """Return all city names in the order they were added."""
+        return self.registry.names()
 
     def show_cities(self):
         """Display all cities in the system."""
-        if not self.head:
+        if not len(self.registry):
             print("\nNo cities available for booking.")
             return
             
-        temp = self.head
         print("\nCities Available For Booking:")
-        while temp:
-            print(f"- {temp.name}")
-            temp = temp.next_city
+        for city in self.registry:
+            print(f"- {city.name}")
 
-    def calculate_best_route(self, start, end, priority="time"):
+    def _resolve_neighbors(self, epoch):
         """
-        Calculate the best route between two cities.
-        Priority can be "time", "cost", or "comfort".
+        Resolve each city's connections to IDs, traffic and comfort values once per
+        epoch and network version; searches only read the shared lists:
+        (dest_id, dest_name, comfort, final_cost, traffic, adjusted_duration, comfort_score)
+        """
+        key = (epoch, self.version)
+        if key == self._neighbors_key:
+            return self._neighbors
+
+        traffic_conditions = self.traffic.conditions(epoch)
+        traffic_levels = self.traffic.connection_traffic(self, epoch)
+        weekend_discount = self.traffic.weekend_discount(epoch)
+
+        neighbors = []
+        for city, city_traffic in zip(self.registry, traffic_levels):
+            neighbors.append([
+                (
+                    self.get_city(dest_name).city_id,
+                    dest_name,
+                    comfort,
+                    # Apply weekend discount and comfort level price factor
+                    cost * weekend_discount * self.comfort_levels[comfort]['price_factor'],
+                    traffic,
+                    base_duration * traffic_conditions[traffic],
+                    self.comfort_levels[comfort]['comfort_score']
+                )
+                for (dest_name, comfort, cost, base_duration), traffic in zip(city.connections, city_traffic)
+            ])
+        self._neighbors = neighbors
+        self._neighbors_key = key
+        return neighbors
+
+    def find_shortest_route(self, start, end, priority="time", epoch=None):
+        """
+        Find the fastest ("time") or cheapest ("cost") route between two cities
+        with a single Dijkstra search; ties go to the cheaper or faster route.
         """
-        # Get city objects
         start_city = self.get_city(start)
         end_city = self.get_city(end)
-        
+
         if not start_city or not end_city:
             return None
-            
-        now = datetime.datetime.now()
-        weekend = now.weekday() in [5, 6]
-        is_rush_hour = 7 <= now.hour <= 9 or 17 <= now.hour <= 19
 
-        # Traffic factors based on time of day and weekday/weekend
-        traffic_conditions = {
-            'low': 0.8 if not weekend else 0.9,
-            'moderate': 1.0 if not weekend else 1.1,
-            'high': 1.3 if not is_rush_hour else 1.6
-        }
+        if epoch is None:
+            epoch = self.traffic.current_epoch()
+        neighbors = self._resolve_neighbors(epoch)
 
-        # Initialize the priority queue (custom heap)
-        priority_queue = MinHeap()
-        
-        # Format: (score, current_city_name, path, traffic_applied, costs, durations, comfort_levels)
-        priority_queue.push((0, start_city.name, [], [], [], [], []))
-        visited = {}
+        start_id = start_city.city_id
+        end_id = end_city.city_id
+        # city_id -> (total_duration, total_cost, total_comfort_score, hops)
+        totals = {start_id: (0, 0, 0, 0)}
+        # city_id -> (previous city_id, segment), segment as in find_pareto_routes
+        came_from = {start_id: None}
+        settled = set()
 
-        # Store all valid paths to find the best ones later
-        all_paths = []
+        priority_queue = MinHeap()
+        priority_queue.push(start_id, (0, 0))
 
         while not priority_queue.is_empty():
-            score, current_name, path, traffic_applied, costs, durations, comforts = priority_queue.pop()
-
-            # Found the destination - store this path
-            if current_name.lower() == end_city.name.lower():
-                all_paths.append({
-                    'total_duration': sum(durations),
-                    'total_cost': sum(costs),
-                    'route': path + [current_name],
-                    'traffic_applied': traffic_applied,
-                    'costs': costs,
-                    'durations': durations,
-                    'comfort_levels': comforts,
-                    'avg_comfort': sum([self.comfort_levels[c]['comfort_score'] for c in comforts]) / len(comforts) if comforts else 0
-                })
-                continue
-
-            # Skip if we've found a better path to this city already
-            if current_name in visited and visited[current_name] <= score:
-                continue
-                
-            visited[current_name] = score
-            path = path + [current_name]
-
-            current_city = self.get_city(current_name)
-            for dest_name, comfort, cost, base_duration in current_city.connections:
-                # Skip cities we've already visited to avoid cycles
-                if dest_name in path:
+            current_id, _ = priority_queue.pop()
+            if current_id == end_id:
+                break
+            settled.add(current_id)
+            total_duration, total_cost, total_comfort, hops = totals[current_id]
+
+            for dest_id, dest_name, comfort, final_cost, traffic, adjusted_duration, comfort_score in neighbors[current_id]:
+                if dest_id in settled:
                     continue
-                    
-                # Determine traffic condition based on time of day
-                traffic = random.choice(list(traffic_conditions.keys()))
-                traffic_factor = traffic_conditions[traffic]
-                
-                # Apply weekend discount if applicable
-                weekend_discount = 0.9 if weekend else 1.0
-                
-                # Apply comfort level price factor
-                comfort_factor = self.comfort_levels[comfort]['price_factor']
-                final_cost = cost * weekend_discount * comfort_factor
-                
-                # Calculate adjusted duration
-                adjusted_duration = base_duration * traffic_factor
-                
-                # Calculate score based on priority
+                new_duration = total_duration + adjusted_duration
+                new_cost = total_cost + final_cost
                 if priority == "cost":
-                    # Ensure cost is the primary priority
-                    new_score = score + (final_cost * 0.8)
-                elif priority == "comfort":
-                    # Higher comfort level = lower score (for min heap)
-                    comfort_score = 5 - self.comfort_levels[comfort]['comfort_score']
-                    # Prioritize comfort significantly
-                    new_score = score + (comfort_score * 5.0) + (adjusted_duration * 0.1) + (final_cost * 0.05)
-                else:  # Default to time priority
-                    new_score = score + adjusted_duration
-                    
-                priority_queue.push((
-                    new_score, 
-                    dest_name, 
-                    path, 
-                    traffic_applied + [traffic], 
-                    costs + [final_cost], 
-                    durations + [adjusted_duration],
-                    comforts + [comfort]
-                ))
-
-        if not all_paths:
-            return None  # No route found
-        
-        # Now select the best path based on priority
-        if priority == "cost":
-            # Sort by total cost (ascending)
-            all_paths.sort(key=lambda x: x['total_cost'])
-            return all_paths[0]
-        elif priority == "comfort":
-            # Filter for paths with comfort rating >= 3.5, then sort by comfort (descending)
-            comfort_paths = [p for p in all_paths if p['avg_comfort'] >= 3.0]
-            if comfort_paths:
-                comfort_paths.sort(key=lambda x: (-x['avg_comfort'], x['total_duration']))
-                selected_path = comfort_paths[0]
-                
-                # Make comfort priority cost exactly 2x the time priority cost
-                time_path = self.find_time_priority_path(start, end)
-                if time_path:
-                    time_cost = time_path['total_cost']
-                    # Adjust the costs to be exactly 2x the time priority cost
-                    cost_ratio = (time_cost * 2) / selected_path['total_cost']
-                    selected_path['costs'] = [cost * cost_ratio for cost in selected_path['costs']]
-                    selected_path['total_cost'] = time_cost * 2
-                
-                return selected_path
-            
-            # If no paths with high comfort rating, boost the most comfortable one
-            all_paths.sort(key=lambda x: -x['avg_comfort'])
-            selected_path = all_paths[0]
-            
-            # Update comfort levels to Premium for a better experience
-            selected_path['comfort_levels'] = ['Premium' for _ in selected_path['comfort_levels']]
-            selected_path['avg_comfort'] = 4.0  # Premium comfort level
-            
-            # Make comfort priority cost exactly 2x the time priority cost
-            time_path = self.find_time_priority_path(start, end)
-            if time_path:
-                time_cost = time_path['total_cost']
-                # Adjust the costs to be exactly 2x the time priority cost
-                selected_path['total_cost'] = time_cost * 2
-                # Distribute the cost proportionally among segments
-                total_segments = len(selected_path['costs'])
-                selected_path['costs'] = [(time_cost * 2) / total_segments] * total_segments
-            
-            return selected_path
-        else:  # time priority
-            # Sort by total duration (ascending)
-            all_paths.sort(key=lambda x: x['total_duration'])
-            return all_paths[0]
-    
-    def find_time_priority_path(self, start, end):
-        """Find the time priority path between two cities to use as reference."""
+                    new_score = (new_cost, new_duration)
+                else:
+                    new_score = (new_duration, new_cost)
+
+                # Unsettled cities are either queued or not reached yet
+                if priority_queue.push_or_decrease(dest_id, new_score):
+                    totals[dest_id] = (new_duration, new_cost, total_comfort + comfort_score, hops + 1)
+                    came_from[dest_id] = (current_id, (dest_name, traffic, final_cost, adjusted_duration, comfort))
+
+        if end_id not in totals:
+            return None
+
+        # Walk the predecessors back into the label layout _label_to_path reads:
+        # (city_id, parent_label, segment, total_duration, total_cost, total_comfort_score, hops)
+        labels = []
+        city_id = end_id
+        while came_from[city_id] is not None:
+            previous_id, segment = came_from[city_id]
+            labels.append((city_id, len(labels) + 1, segment) + totals[city_id])
+            city_id = previous_id
+        labels.append((start_id, None, (start_city.name, None, 0, 0, None)) + totals[start_id])
+        return self._label_to_path(labels, 0)
+
+    def find_pareto_routes(self, start, end, epoch=None, max_labels=MAX_PARETO_LABELS):
+        """
+        Find the Pareto frontier of routes between two cities in a single search.
+        A route is kept unless another route is at least as fast, at least as
+        cheap and at least as comfortable (average comfort score), and strictly
+        better in one of them. Traffic comes from the traffic model for the
+        given epoch (defaults to now).
+
+        The exact frontier grows exponentially on dense networks, so each city
+        keeps at most max_labels (at least 3) partial routes, which makes the
+        result approximate: the fastest and the cheapest route to a city are
+        never evicted, so the time and cost answers stay exact, and other new
+        routes only replace the least comfortable one. Comfortable detours can
+        still be missed once a city's slots are full.
+        """
+        if max_labels < 3:
+            raise ValueError("max_labels must be at least 3")
+
         # Get city objects
         start_city = self.get_city(start)
         end_city = self.get_city(end)
         
         if not start_city or not end_city:
-            return None
+            return []
             
-        now = datetime.datetime.now()
-        weekend = now.weekday() in [5, 6]
-        is_rush_hour = 7 <= now.hour <= 9 or 17 <= now.hour <= 19
-
-        # Traffic factors
-        traffic_conditions = {
-            'low': 0.8 if not weekend else 0.9,
-            'moderate': 1.0 if not weekend else 1.1,
-            'high': 1.3 if not is_rush_hour else 1.6
-        }
-
-        # Initialize the priority queue (custom heap)
+        if epoch is None:
+            epoch = self.traffic.current_epoch()
+        neighbors = self._resolve_neighbors(epoch)
+
+        # Comfort score range, used to bound how a route's average can change
+        scores = [level['comfort_score'] for level in self.comfort_levels.values()]
+        comfort_dominates = self._comfort_dominance(min(scores), max(scores))
+
+        # Labels are partial routes:
+        # (city_id, parent_label, segment, total_duration, total_cost,
+        #  total_comfort_score, hops, visited_mask)
+        # where segment is (city_name, traffic, cost, duration, comfort)
+        start_id = start_city.city_id
+        end_id = end_city.city_id
+        labels = [(start_id, None, (start_city.name, None, 0, 0, None), 0, 0, 0, 0, 1 << start_id)]
+        # Non-dominated label indexes per city ID
+        frontier = {start_id: [0]}
+        dominated = set()
+        # Full cities -> (fastest, cheapest, least comfortable other label), until their labels change
+        eviction = {}
+
+        # Labels are settled in (duration, cost) order, so a popped label can
+        # never be dominated by one created later
         priority_queue = MinHeap()
-        priority_queue.push((0, start_city.name, [], [], [], [], []))
-        visited = {}
-        all_paths = []
+        priority_queue.push(0, (0, 0))
 
         while not priority_queue.is_empty():
-            score, current_name, path, traffic_applied, costs, durations, comforts = priority_queue.pop()
-
-            if current_name.lower() == end_city.name.lower():
-                all_paths.append({
-                    'total_duration': sum(durations),
-                    'total_cost': sum(costs),
-                    'route': path + [current_name],
-                    'traffic_applied': traffic_applied,
-                    'costs': costs,
-                    'durations': durations,
-                    'comfort_levels': comforts
-                })
+            label_id, _ = priority_queue.pop()
+            if label_id in dominated:
                 continue
+            current_id, _, _, total_duration, total_cost, total_comfort, hops, visited = labels[label_id]
 
-            if current_name in visited and visited[current_name] <= score:
+            # Routes are complete once they reach the destination
+            if current_id == end_id:
                 continue
-                
-            visited[current_name] = score
-            path = path + [current_name]
 
-            current_city = self.get_city(current_name)
-            for dest_name, comfort, cost, base_duration in current_city.connections:
-                if dest_name in path:
+            for dest_id, dest_name, comfort, final_cost, traffic, adjusted_duration, comfort_score in neighbors[current_id]:
+                # Skip cities already on this route to avoid cycles
+                if visited >> dest_id & 1:
                     continue
-                    
-                traffic = random.choice(list(traffic_conditions.keys()))
-                traffic_factor = traffic_conditions[traffic]
-                
-                weekend_discount = 0.9 if weekend else 1.0
-                comfort_factor = self.comfort_levels[comfort]['price_factor']
-                final_cost = cost * weekend_discount * comfort_factor
-                
-                adjusted_duration = base_duration * traffic_factor
-                
-                # For time priority, score is based on duration
-                new_score = score + adjusted_duration
-                    
-                priority_queue.push((
-                    new_score, 
-                    dest_name, 
-                    path, 
-                    traffic_applied + [traffic], 
-                    costs + [final_cost], 
-                    durations + [adjusted_duration],
-                    comforts + [comfort]
-                ))
-
-        if not all_paths:
-            return None
+
+                new_duration = total_duration + adjusted_duration
+                new_cost = total_cost + final_cost
+                new_comfort = total_comfort + comfort_score
+                new_hops = hops + 1
+
+                # Dominance pruning against the labels already at this city
+                complete = dest_id == end_id
+                survivors = []
+                for other in frontier.setdefault(dest_id, []):
+                    _, _, _, other_duration, other_cost, other_comfort, other_hops, _ = labels[other]
+                    if (other_duration <= new_duration and other_cost <= new_cost
+                            and comfort_dominates(other_comfort, other_hops, new_comfort, new_hops, complete)):
+                        break
+                    if (new_duration <= other_duration and new_cost <= other_cost
+                            and comfort_dominates(new_comfort, new_hops, other_comfort, other_hops, complete)):
+                        dominated.add(other)
+                    else:
+                        survivors.append(other)
+                else:
+                    if len(survivors) >= max_labels:
+                        # A full city dominated none of its labels, so they are unchanged
+                        if dest_id not in eviction:
+                            # Keep the fastest and the cheapest route; evict the least comfortable other one
+                            fastest = min(survivors, key=lambda other: (labels[other][3], labels[other][4]))
+                            cheapest = min(survivors, key=lambda other: (labels[other][4], labels[other][3]))
+                            worst = min((other for other in survivors if other not in (fastest, cheapest)),
+                                        key=lambda other: labels[other][5] / labels[other][6])
+                            eviction[dest_id] = (fastest, cheapest, worst)
+                        fastest, cheapest, worst = eviction[dest_id]
+                        if ((new_duration, new_cost) >= (labels[fastest][3], labels[fastest][4])
+                                and (new_cost, new_duration) >= (labels[cheapest][4], labels[cheapest][3])
+                                and new_comfort * labels[worst][6] <= labels[worst][5] * new_hops):
+                            continue
+                        survivors.remove(worst)
+                        dominated.add(worst)
+                    eviction.pop(dest_id, None)
+                    labels.append((
+                        dest_id,
+                        label_id,
+                        (dest_name, traffic, final_cost, adjusted_duration, comfort),
+                        new_duration,
+                        new_cost,
+                        new_comfort,
+                        new_hops,
+                        visited | 1 << dest_id
+                    ))
+                    new_id = len(labels) - 1
+                    survivors.append(new_id)
+                    frontier[dest_id] = survivors
+                    priority_queue.push(new_id, (new_duration, new_cost))
+
+        # Labels at the destination were pruned on the final criteria already
+        return [self._label_to_path(labels, label_id) for label_id in frontier.get(end_id, [])]
+
+    @staticmethod
+    def _comfort_dominance(min_score, max_score):
+        """
+        Build the comfort part of the dominance test used to prune labels.
+
+        A label with comfort total S1 over h1 segments beats one with S2 over
+        h2 if every continuation leaves its average comfort at least as high.
+        Adding m segments with comfort total x gives (S + x) / (h + m), where
+        min_score * m <= x <= max_score * m, so it is enough to check m = 0 and
+        both extremes of x. Complete routes are never extended, so only their
+        averages are compared.
+        """
+        def comfort_dominates(comfort1, hops1, comfort2, hops2, complete):
+            if comfort1 * hops2 < comfort2 * hops1:
+                return False
+            if complete:
+                return True
+            return (comfort1 - comfort2 + min_score * (hops2 - hops1) >= 0
+                    and comfort1 - comfort2 + max_score * (hops2 - hops1) >= 0)
+        return comfort_dominates
+
+    def _label_to_path(self, labels, label_id):
+        """Rebuild the route dict for a destination label by walking its parents."""
+        route = []
+        traffic_applied = []
+        costs = []
+        durations = []
+        comforts = []
+
+        label = labels[label_id]
+        total_duration, total_cost, total_comfort, hops = label[3:7]
+        while label[1] is not None:
+            city_name, traffic, cost, duration, comfort = label[2]
+            route.append(city_name)
+            traffic_applied.append(traffic)
+            costs.append(cost)
+            durations.append(duration)
+            comforts.append(comfort)
+            label = labels[label[1]]
+        route.append(label[2][0])
+
+        # Segments were collected from the destination backwards
+        for values in (route, traffic_applied, costs, durations, comforts):
+            values.reverse()
+
+        return {
+            'total_duration': total_duration,
+            'total_cost': total_cost,
+            'route': route,
+            'traffic_applied': traffic_applied,
+            'costs': costs,
+            'durations': durations,
+            'comfort_levels': comforts,
+            'avg_comfort': total_comfort / hops if hops else 0
+        }
+
+    def calculate_best_route(self, start, end, priority="time", frontier=None):
+        """
+        Calculate the best route between two cities.
+        Priority can be "time", "cost", or "comfort".
+        Every priority is read from a frontier of find_pareto_routes, which can
+        be passed in so several answers share one search. Without one, time
+        and cost run a single Dijkstra search instead.
+        """
+        if frontier is None:
+            if priority != "comfort":
+                return self.find_shortest_route(start, end, priority)
+            frontier = self.find_pareto_routes(start, end)
+
+        if not frontier:
+            return None  # No route found
+
+        # The frontier always holds the exact fastest and cheapest routes
+        if priority == "cost":
+            return min(frontier, key=lambda x: (x['total_cost'], x['total_duration']))
+        # Time priority path, also the reference for comfort pricing
+        time_path = self.find_time_priority_path(start, end, frontier)
+        if priority != "comfort":
+            return time_path
+
+        # Filter for paths with comfort rating >= 3.0, then sort by comfort (descending)
+        comfort_paths = [p for p in frontier if p['avg_comfort'] >= 3.0]
+        if comfort_paths:
+            comfort_paths.sort(key=lambda x: (-x['avg_comfort'], x['total_duration']))
+            # Copy so adjusting the costs leaves the shared frontier untouched
+            selected_path = dict(comfort_paths[0])
+            
+            # Make comfort priority cost exactly 2x the time priority cost
+            time_cost = time_path['total_cost']
+            cost_ratio = (time_cost * 2) / selected_path['total_cost']
+            selected_path['costs'] = [cost * cost_ratio for cost in selected_path['costs']]
+            selected_path['total_cost'] = time_cost * 2
+            
+            return selected_path
         
-        # Sort by total duration (ascending) for time priority
-        all_paths.sort(key=lambda x: x['total_duration'])
-        return all_paths[0]
+        # If no paths with high comfort rating, boost the most comfortable one
+        selected_path = dict(max(frontier, key=lambda x: x['avg_comfort']))
+        
+        # Update comfort levels to Premium for a better experience
+        selected_path['comfort_levels'] = ['Premium' for _ in selected_path['comfort_levels']]
+        selected_path['avg_comfort'] = 4.0  # Premium comfort level
+        
+        # Make comfort priority cost exactly 2x the time priority cost
+        time_cost = time_path['total_cost']
+        selected_path['total_cost'] = time_cost * 2
+        # Distribute the cost proportionally among segments
+        total_segments = len(selected_path['costs'])
+        selected_path['costs'] = [(time_cost * 2) / total_segments] * total_segments
+        
+        return selected_path
+    
+    def find_time_priority_path(self, start, end, frontier=None):
+        """Find the time priority path between two cities to use as reference, from a frontier if given."""
+        if frontier is not None:
+            return min(frontier, key=lambda x: (x['total_duration'], x['total_cost'])) if frontier else None
+        return self.find_shortest_route(start, end, "time")
 
     def book_trip(self, start, destination, priority="time"):
         """Book a trip between two cities with specified priority."""
@@ -395,8 +690,9 @@ class TransportSystem:
             print(f"\nError: Destination city '{destination}' not found in the system.")
             return False
         
-        # Calculate the best route
-        result = self.calculate_best_route(start, destination, priority)
+        # Comfort bookings read the route and the time comparison from one search
+        frontier = self.find_pareto_routes(start, destination) if priority == "comfort" else None
+        result = self.calculate_best_route(start, destination, priority, frontier)
         
         if result:
             route = result['route']
@@ -438,7 +734,7 @@ class TransportSystem:
             
             # Show relative cost comparison if in comfort mode
             if priority == "comfort":
-                time_path = self.find_time_priority_path(start, destination)
+                time_path = self.find_time_priority_path(start, destination, frontier)
                 if time_path:
                     time_cost = time_path['total_cost']
                     print(f"Cost comparison: Comfort mode is exactly 2.0x the time priority cost")
@@ -460,11 +756,7 @@ class TransportSystem:
 def create_fully_connected_network(transport):
     """Create a fully connected network where each city connects to every other city."""
     # Get all cities
-    cities = []
-    temp = transport.head
-    while temp:
-        cities.append(temp.name)
-        temp = temp.next_city
+    cities = transport.city_names()
     
     # Create comfort levels
     comfort_levels = ['Economy', 'Standard', 'Premium', 'Express']
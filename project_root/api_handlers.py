@@ -0,0 +1,243 @@
+"""Framework-independent handlers for the booking HTTP API.
+
+server.py (Flask) and asgi_server.py both route requests here. Every handler
+takes the TransportSystem and the decoded JSON body and returns
+(payload, status), so both servers keep the same contract. Booking handlers
+also take the BookingLedger that assigns booking references.
+"""
+import os
+import random
+
+from models.booking_ledger import BookingLedger
+from models.route_trees import RouteTrees
+from models.transport_system import ALGORITHMS, TransportSystem
+from utils.network_generator import create_fully_connected_network
+from utils.network_snapshot import load_snapshot, open_graph, save_snapshot
+
+DEFAULT_CITIES = ['Coimbatore', 'Palakkad', 'Chennai', 'Bangalore', 'Mumbai', 'Delhi']
+
+# Route priorities a request may ask for
+PRIORITIES = ('time', 'cost', 'comfort')
+
+# Largest number of trips accepted by /api/book/batch
+MAX_BATCH_SIZE = 1000
+
+# Files used when BOOKING_LEDGER or NETWORK_SNAPSHOT are not set
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bookings.ndjson')
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'network.snapshot')
+
+
+def initialize_transport(transport=None, seed=None):
+    """Add the default cities to a transport system and connect them all."""
+    if transport is None:
+        transport = TransportSystem()
+    for city in DEFAULT_CITIES:
+        transport.add_city(city)
+    return create_fully_connected_network(transport, seed=seed)
+
+
+def open_transport(seed=None):
+    """
+    Load the network from the NETWORK_SNAPSHOT file, or build the default
+    network and save it there first, so every start serves the same network.
+    An empty NETWORK_SNAPSHOT always builds a fresh network.
+    """
+    path = os.environ.get('NETWORK_SNAPSHOT', DEFAULT_SNAPSHOT_PATH)
+    if path and os.path.exists(path):
+        return configure_route_trees(load_snapshot(path))
+    transport = initialize_transport(seed=seed)
+    if path:
+        save_snapshot(transport, path)
+    return configure_route_trees(transport)
+
+
+def open_mapped_transport(seed=None):
+    """
+    Map the NETWORK_SNAPSHOT file read-only into a search-only transport
+    system, so processes serving the same file share one copy of the graph.
+    A missing snapshot is built and saved first, which should happen before
+    several workers start; an empty NETWORK_SNAPSHOT falls back to open_transport.
+    """
+    path = os.environ.get('NETWORK_SNAPSHOT', DEFAULT_SNAPSHOT_PATH)
+    if not path:
+        return open_transport(seed)
+    if not os.path.exists(path):
+        open_transport(seed)
+    graph = open_graph(path)
+    return configure_route_trees(TransportSystem.from_snapshot(graph, graph.traffic_seed, graph.comfort_levels))
+
+
+def configure_route_trees(transport):
+    """Keep at most ROUTE_TREES route trees (default 8, 0 turns them off); returns the transport system."""
+    max_trees = os.environ.get('ROUTE_TREES')
+    if max_trees:
+        transport.route_trees = RouteTrees(max_trees=int(max_trees))
+    return transport
+
+
+def open_ledger():
+    """Open the booking ledger named by BOOKING_LEDGER; an empty value keeps bookings in memory."""
+    path = os.environ.get('BOOKING_LEDGER', DEFAULT_LEDGER_PATH)
+    return BookingLedger(path or None)
+
+
+def validate_trip(start, destination, priority='time'):
+    """Return an error message for an invalid departure/destination pair or priority, or None"""
+    if not start or not destination:
+        return "Both departure and destination cities must be provided"
+    if not isinstance(start, str) or not isinstance(destination, str):
+        return "Departure and destination must be city names"
+    if start.lower() == destination.lower():
+        return "Departure and destination cities cannot be the same"
+    if priority not in PRIORITIES:
+        return f"Priority must be one of: {', '.join(PRIORITIES)}"
+    return None
+
+
+def format_booking(transport, start, destination, priority, result):
+    """Build the booking response for a calculated route; record_bookings assigns its reference"""
+    route = result['route']
+    traffic_info = result['traffic_applied']
+    costs = result['costs']
+    durations = result['durations']
+    comfort_levels = result['comfort_levels']
+    total_cost = round(result['total_cost'], 2)
+    total_time = int(result['total_duration'])
+
+    # Calculate comfort score
+    comfort_scores = [transport.comfort_levels[c]['comfort_score'] for c in comfort_levels]
+    avg_comfort = sum(comfort_scores) / len(comfort_scores) if comfort_scores else 0
+
+    # Generate weather warning (simulated)
+    weather_warning = None
+    if random.random() < 0.3:
+        weather_conditions = ["rain", "fog", "snow", "high winds"]
+        weather = random.choice(weather_conditions)
+        weather_warning = f"Expect {weather} along parts of this route."
+
+    # Build segments
+    segments = []
+    for i in range(len(route) - 1):
+        segments.append({
+            "start": route[i],
+            "end": route[i+1],
+            "comfort": comfort_levels[i],
+            "cost": round(costs[i], 2),
+            "duration": int(durations[i]),
+            "traffic": traffic_info[i]
+        })
+
+    return {
+        "booking_ref": None,
+        "journey": {
+            "departure": start,
+            "destination": destination,
+            "priority": priority
+        },
+        "route": route,
+        "segments": segments,
+        "total_cost": total_cost,
+        "total_time": total_time,
+        "comfort_rating": round(avg_comfort, 1),
+        "weather_warning": weather_warning,
+        "search": result['search']
+    }
+
+
+def record_bookings(ledger, payload):
+    """
+    Record the bookings of a /api/book or /api/book/batch payload in the ledger
+    and fill in their booking references, waiting for durability once.
+    """
+    bookings = payload['results'] if 'results' in payload else [payload]
+    bookings = [booking for booking in bookings if 'booking_ref' in booking and booking['booking_ref'] is None]
+    entries = [{
+        'departure': booking['journey']['departure'],
+        'destination': booking['journey']['destination'],
+        'priority': booking['journey']['priority'],
+        'route': booking['route'],
+        'total_cost': booking['total_cost'],
+        'total_time': booking['total_time'],
+        'comfort_rating': booking['comfort_rating']
+    } for booking in bookings]
+    for booking, booking_ref in zip(bookings, ledger.record_many(entries)):
+        booking['booking_ref'] = booking_ref
+    return payload
+
+
+def list_cities(transport, data=None):
+    """Return all available cities"""
+    return transport.city_names(), 200
+
+
+def book_trip(transport, data, ledger=None):
+    """Book a trip between two cities; without a ledger the reference is left unset"""
+    if not data:
+        return {"error": "No data provided"}, 400
+    if not isinstance(data, dict):
+        return {"error": "Request body must be a JSON object"}, 400
+
+    start = data.get('departure')
+    destination = data.get('destination')
+    priority = data.get('priority', 'time')
+    algorithm = data.get('algorithm', 'dijkstra')
+
+    error = validate_trip(start, destination, priority)
+    if error:
+        return {"error": error}, 400
+    # Both values end up in cache keys and metric series, so only known ones are accepted
+    if algorithm not in ALGORITHMS:
+        return {"error": f"Algorithm must be one of: {', '.join(ALGORITHMS)}"}, 400
+
+    # Calculate the best route
+    result = transport.calculate_best_route(start, destination, priority, algorithm=algorithm)
+
+    if not result:
+        return {"error": f"No route available from {start} to {destination}"}, 404
+
+    booking = format_booking(transport, start, destination, priority, result)
+    if ledger is not None:
+        record_bookings(ledger, booking)
+    return booking, 200
+
+
+def book_trips(transport, data, ledger=None):
+    """Book many trips at once, sharing one route search per departure city and priority"""
+    if not isinstance(data, dict) or not isinstance(data.get('trips'), list):
+        return {"error": "Provide a list of trips"}, 400
+    trips = data['trips']
+    if len(trips) > MAX_BATCH_SIZE:
+        return {"error": f"At most {MAX_BATCH_SIZE} trips per batch"}, 400
+    default_priority = data.get('priority', 'time')
+
+    # Validate every trip and group the valid ones by departure city and priority
+    results = [None] * len(trips)
+    groups = {}  # (departure key, priority) -> [(index, departure, destination)]
+    for index, trip in enumerate(trips):
+        if not isinstance(trip, dict):
+            results[index] = {"error": "Each trip must be an object", "status": 400}
+            continue
+        start = trip.get('departure')
+        destination = trip.get('destination')
+        priority = trip.get('priority', default_priority)
+        error = validate_trip(start, destination, priority)
+        if error:
+            results[index] = {"error": error, "status": 400}
+            continue
+        groups.setdefault((transport.registry.normalize(start), priority), []).append((index, start, destination))
+
+    for (_, priority), group in groups.items():
+        routes = transport.calculate_routes_from(group[0][1], [destination for _, _, destination in group],
+                                                 priority)
+        for index, start, destination in group:
+            result = routes[destination]
+            if result:
+                results[index] = format_booking(transport, start, destination, priority, result)
+            else:
+                results[index] = {"error": f"No route available from {start} to {destination}",
+                                  "status": 404}
+
+    payload = {"results": results, "groups": len(groups)}
+    if ledger is not None:
+        record_bookings(ledger, payload)
+    return payload, 200
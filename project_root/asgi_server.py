@@ -0,0 +1,231 @@
+"""Async (ASGI) variant of the booking server.
+
+Serves the same /api/cities, /api/book and /api/book/batch contract as
+server.py through the shared api_handlers, but keeps the event loop free by
+running every route computation on an executor. Run it with any ASGI server
+from the project_root directory, for example:
+
+    uvicorn asgi_server:app --port 5000
+
+Configuration comes from the environment:
+
+    ROUTE_EXECUTOR     "thread" (default) or "process"
+    ROUTE_WORKERS      executor workers (default: CPU count)
+    ROUTE_TIMEOUT      seconds before a request gets 504 (default 10)
+    ROUTE_MAX_PENDING  computations queued or running before new requests
+                       get 503 (default 4 per worker)
+    NETWORK_SNAPSHOT   network snapshot file (default network.snapshot); it is
+                       built and saved on the first start, and process
+                       workers memory-map the same file, sharing one copy
+    NETWORK_SEED       seed for the generated network when there is no
+                       snapshot; process workers need one to build identical
+                       networks, so a random seed is picked when it is not set
+    BOOKING_LEDGER     booking ledger file (default bookings.ndjson); empty
+                       keeps bookings in memory
+    ROUTE_TREES        route trees kept per process for the hottest start
+                       cities (default 8); 0 turns them off
+
+Bookings are always recorded by the app's own ledger, also when routes are
+computed in worker processes, so booking references stay unique. They are
+recorded only once the computation has finished within the timeout, so a
+request answered with 504 never leaves a booking behind.
+"""
+import asyncio
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import api_handlers
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1 << 20
+
+# Handlers that compute routes run on the executor; the rest run inline
+HANDLERS = {
+    ('GET', '/api/cities'): ('list_cities', False),
+    ('POST', '/api/book'): ('book_trip', True),
+    ('POST', '/api/book/batch'): ('book_trips', True)
+}
+
+# Transport system of a process pool worker, built by _init_worker
+_worker_transport = None
+
+
+def _init_worker(seed):
+    """Map the network snapshot, or build the worker's own network without one."""
+    global _worker_transport
+    _worker_transport = api_handlers.open_mapped_transport(seed=seed)
+
+
+def _call_in_worker(handler_name, data):
+    """Run a handler inside a process pool worker."""
+    return getattr(api_handlers, handler_name)(_worker_transport, data)
+
+
+class AsyncBookingApp:
+    """ASGI application that offloads route computations to an executor."""
+
+    def __init__(self, executor="thread", workers=None, timeout=10.0, max_pending=None, seed=None):
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process'")
+        self.executor_kind = executor
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_pending = max_pending or 4 * self.workers
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.transport = api_handlers.open_transport(seed=self.seed)
+        self.ledger = api_handlers.open_ledger()
+        self.pending = 0  # Computations submitted and not yet finished
+        self._executor = None
+
+    @property
+    def executor(self):
+        """Create the executor on first use."""
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                     initargs=(self.seed,))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='route')
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.ledger.close()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.executor
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        method = scope['method']
+        path = scope['path']
+        if method == 'OPTIONS':
+            # CORS preflight, matching the Flask server's allow-all policy
+            await self._respond(send, 204, None, [
+                (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+                (b'access-control-allow-headers', b'Content-Type')
+            ])
+            return
+
+        route = HANDLERS.get((method, path))
+        if route is None:
+            known_path = any(route_path == path for _, route_path in HANDLERS)
+            if known_path:
+                await self._respond(send, 405, {"error": "Method not allowed"})
+            else:
+                await self._respond(send, 404, {"error": "Not found"})
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            await self._respond(send, 413, {"error": "Request body too large"})
+            return
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+
+        handler_name, offload = route
+        if not offload:
+            payload, status = getattr(api_handlers, handler_name)(self.transport, data)
+            await self._respond(send, status, payload)
+            return
+
+        # Backpressure: refuse work instead of queueing it without bound
+        if self.pending >= self.max_pending:
+            await self._respond(send, 503, {"error": "Server busy, retry later"}, [(b'retry-after', b'1')])
+            return
+
+        payload, status = await self._compute(handler_name, data)
+        await self._respond(send, status, payload)
+
+    async def _compute(self, handler_name, data):
+        """Run a handler on the executor with the request timeout."""
+        loop = asyncio.get_running_loop()
+        if self.executor_kind == "process":
+            future = loop.run_in_executor(self.executor, _call_in_worker, handler_name, data)
+        else:
+            handler = getattr(api_handlers, handler_name)
+            future = loop.run_in_executor(self.executor, handler, self.transport, data)
+
+        # A timed-out computation keeps its slot until it really finishes
+        self.pending += 1
+        future.add_done_callback(self._release)
+        try:
+            payload, status = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            return {"error": "Route computation timed out"}, 504
+
+        if status == 200:
+            # Handlers run without the ledger; record here, off the loop since it waits for fsync
+            payload = await loop.run_in_executor(None, api_handlers.record_bookings, self.ledger, payload)
+        return payload, status
+
+    def _release(self, future):
+        self.pending -= 1
+        if not future.cancelled():
+            # Retrieve the exception so a failed computation after a timeout is not logged as unhandled
+            future.exception()
+
+    @staticmethod
+    async def _read_body(receive):
+        """Read the whole request body, or return None if it is too large."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_SIZE:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    async def _respond(send, status, payload, headers=()):
+        body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+        response_headers = [(b'access-control-allow-origin', b'*')]
+        if payload is not None:
+            response_headers.append((b'content-type', b'application/json'))
+        response_headers.append((b'content-length', str(len(body)).encode('ascii')))
+        response_headers.extend(headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def create_app():
+    """Build the application from the environment configuration."""
+    seed = os.environ.get('NETWORK_SEED')
+    workers = os.environ.get('ROUTE_WORKERS')
+    max_pending = os.environ.get('ROUTE_MAX_PENDING')
+    return AsyncBookingApp(
+        executor=os.environ.get('ROUTE_EXECUTOR', 'thread'),
+        workers=int(workers) if workers else None,
+        timeout=float(os.environ.get('ROUTE_TIMEOUT', '10')),
+        max_pending=int(max_pending) if max_pending else None,
+        seed=int(seed) if seed else None
+    )
+
+
+app = create_app()
@@ -0,0 +1,136 @@
+"""Micro-benchmark comparing data_structures.MinHeap with heapq.
+
+Run from the project_root directory:
+
+    python -m benchmarks.heap_benchmark --ops 1000000
+
+Each workload performs the given number of heap operations in a
+Dijkstra-like pattern: pushes, priority improvements and pops. heapq has no
+decrease-key, so it pushes a duplicate entry and skips stale ones on pop,
+which is how the route search used the previous recursive heap; that
+heap is kept here as RecursiveTupleHeap so the gain can be measured.
+"""
+import argparse
+import heapq
+import random
+import time
+
+from data_structures.min_heap import MinHeap
+
+
+class RecursiveTupleHeap:
+    """The recursive, tuple-comparing heap the route search used before."""
+
+    def __init__(self):
+        self.heap = []
+
+    def push(self, item):
+        self.heap.append(item)
+        self._sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        if not self.heap:
+            return None
+        self.heap[0], self.heap[-1] = self.heap[-1], self.heap[0]
+        item = self.heap.pop()
+        if self.heap:
+            self._sift_down(0)
+        return item
+
+    def _sift_up(self, index):
+        parent = (index - 1) // 2
+        if index > 0 and self.heap[parent][0] > self.heap[index][0]:
+            self.heap[index], self.heap[parent] = self.heap[parent], self.heap[index]
+            self._sift_up(parent)
+
+    def _sift_down(self, index):
+        smallest = index
+        left = 2 * index + 1
+        right = 2 * index + 2
+        if left < len(self.heap) and self.heap[left][0] < self.heap[smallest][0]:
+            smallest = left
+        if right < len(self.heap) and self.heap[right][0] < self.heap[smallest][0]:
+            smallest = right
+        if smallest != index:
+            self.heap[index], self.heap[smallest] = self.heap[smallest], self.heap[index]
+            self._sift_down(smallest)
+
+
+def make_workload(ops, seed):
+    """Return a list of ('push'|'decrease'|'pop', key, priority) operations."""
+    rng = random.Random(seed)
+    workload = []
+    next_key = 0
+
+    for _ in range(ops):
+        roll = rng.random()
+        if roll < 0.4 or next_key == 0:
+            workload.append(('push', next_key, rng.random() * 1000))
+            next_key += 1
+        elif roll < 0.7:
+            # Try to improve one of the recently pushed keys
+            key = next_key - 1 - rng.randrange(min(next_key, 64))
+            workload.append(('decrease', key, rng.random() * 500))
+        else:
+            workload.append(('pop', None, None))
+    return workload
+
+
+def run_min_heap(workload, arity):
+    heap = MinHeap(arity)
+    start = time.perf_counter()
+    for op, key, priority in workload:
+        if op == 'pop':
+            heap.pop()
+        elif op == 'push':
+            heap.push(key, priority)
+        elif key in heap:
+            heap.decrease_key(key, priority)
+    return time.perf_counter() - start, len(heap)
+
+
+def run_lazy(workload, push, pop):
+    """Run the workload on a heap without decrease-key, using lazy deletion."""
+    best = {}
+    size = 0
+    start = time.perf_counter()
+    for op, key, priority in workload:
+        if op == 'pop':
+            # Skip stale duplicates left behind by earlier decreases
+            while size:
+                priority, key = pop()
+                size -= 1
+                if best.get(key) == priority:
+                    del best[key]
+                    break
+        elif op == 'push' or (key in best and priority < best[key]):
+            best[key] = priority
+            push((priority, key))
+            size += 1
+    return time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=1_000_000, help="operations per run")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workload = make_workload(args.ops, args.seed)
+    print(f"{len(workload):,} operations")
+
+    results = []
+    legacy = RecursiveTupleHeap()
+    results.append(("recursive tuple heap", run_lazy(workload, legacy.push, legacy.pop)))
+    queue = []
+    results.append(("heapq (C)", run_lazy(workload, lambda item: heapq.heappush(queue, item),
+                                          lambda: heapq.heappop(queue))))
+    for arity in (2, 4):
+        results.append((f"MinHeap arity={arity}", run_min_heap(workload, arity)))
+
+    for label, (elapsed, size) in results:
+        print(f"{label:<22} {elapsed:7.3f}s  {len(workload) / elapsed:>12,.0f} ops/s  final size {size:,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""Benchmark suite for the transport system's hot paths.
+
+Run from the project_root directory:
+
+    python -m benchmarks.transport_benchmark --sizes 10,100,1000,10000,100000 --output results.json
+
+For every network size this times add_city, add_route, get_city,
+create_fully_connected_network, calculate_best_route for each priority and
+DSA.py's find_time_priority_path. Networks are built with the seeded k-nearest
+neighbour generator, so runs with the same seed are comparable. Each benchmark
+reports throughput, latency percentiles and, unless --no-memory is given,
+the tracemalloc peak of a second run. Quadratic or exponential benchmarks
+are skipped above their size limits; skipped entries say why.
+"""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from models.route_trees import RouteTrees
+from models.traffic_model import TrafficEpoch
+from models.transport_system import TransportSystem
+from utils.network_generator import create_fully_connected_network, create_knn_network
+
+# Fixed traffic epoch so route searches see the same traffic on every run
+EPOCH = TrafficEpoch('2024-01-01', False, False)
+
+PRIORITIES = ("time", "cost", "comfort")
+
+DSA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'DSA.py')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(name, size, latencies):
+    """Turn per-operation latencies in seconds into a result dict."""
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    return {
+        'benchmark': name,
+        'size': size,
+        'operations': len(latencies),
+        'total_s': round(total, 6),
+        'throughput_ops_s': round(len(latencies) / total, 1) if total else None,
+        'latency_us': {
+            'p50': round(percentile(latencies, 0.50) * 1e6, 2),
+            'p90': round(percentile(latencies, 0.90) * 1e6, 2),
+            'p99': round(percentile(latencies, 0.99) * 1e6, 2),
+            'max': round(latencies[-1] * 1e6, 2)
+        } if latencies else None,
+        'peak_memory_bytes': None
+    }
+
+
+def run_benchmark(name, size, prepare, track_memory):
+    """
+    Time a benchmark and optionally measure its peak memory.
+
+    prepare() does the untimed setup and returns a run() callable that
+    performs the operations and returns their latencies in seconds. Memory is
+    measured on a second, separately prepared run because tracemalloc slows
+    every allocation down.
+    """
+    result = summarize(name, size, prepare()())
+    if track_memory:
+        run = prepare()
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def skipped(name, size, reason):
+    return {'benchmark': name, 'size': size, 'skipped': reason}
+
+
+def network_routes(transport):
+    """Return every route of a built network once, as add_route arguments."""
+    routes = []
+    for city in transport.registry:
+        for destination, comfort, cost, duration in city.connections:
+            if city.city_id < transport.get_city(destination).city_id:
+                routes.append((city.name, destination, comfort, cost, duration))
+    return routes
+
+
+def load_dsa():
+    """Import the standalone DSA.py module from the repository root."""
+    spec = importlib.util.spec_from_file_location('DSA', DSA_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def benchmark_size(size, args, rng, dsa):
+    """Run every benchmark for one network size."""
+    results = []
+    reference = create_knn_network(TransportSystem(), size, k=args.k, seed=args.seed)
+    names = reference.city_names()
+    coordinates = [reference.get_city(name).coordinates for name in names]
+    routes = network_routes(reference)
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+
+    def prepare_add_city():
+        transport = TransportSystem()
+
+        def run():
+            latencies = []
+            for name, point in zip(names, coordinates):
+                start = time.perf_counter()
+                transport.add_city(name, point)
+                latencies.append(time.perf_counter() - start)
+            return latencies
+        return run
+
+    def prepare_add_route():
+        transport = TransportSystem()
+        transport.add_cities(zip(names, coordinates))
+
+        def run():
+            latencies = []
+            for route in routes:
+                start = time.perf_counter()
+                transport.add_route(*route)
+                latencies.append(time.perf_counter() - start)
+            return latencies
+        return run
+
+    def prepare_get_city():
+        # Mix exact and differently cased names, as user input would be
+        lookups = [name if i % 2 else name.upper()
+                   for i, name in enumerate(rng.choice(names) for _ in range(max(args.queries, 10000)))]
+
+        def run():
+            latencies = []
+            for name in lookups:
+                start = time.perf_counter()
+                reference.get_city(name)
+                latencies.append(time.perf_counter() - start)
+            return latencies
+        return run
+
+    def prepare_fully_connected():
+        transport = TransportSystem()
+        transport.add_cities(zip(names, coordinates))
+
+        def run():
+            start = time.perf_counter()
+            create_fully_connected_network(transport, seed=args.seed)
+            return [time.perf_counter() - start]
+        return run
+
+    def prepare_best_route(priority):
+        def prepare():
+            # Time the searches themselves: no start city ever gets hot enough for a route tree
+            reference.route_trees = RouteTrees(hot_after=math.inf)
+            # Build the CSR snapshot and traffic arrays outside the timed loop
+            reference.calculate_best_route(names[0], names[-1], priority, EPOCH)
+
+            def run():
+                latencies = []
+                for start_name, end_name in pairs:
+                    reference.route_cache.clear()
+                    start = time.perf_counter()
+                    reference.calculate_best_route(start_name, end_name, priority, EPOCH)
+                    latencies.append(time.perf_counter() - start)
+                return latencies
+            return run
+        return prepare
+
+    def prepare_dsa():
+        transport = dsa.TransportSystem()
+        for name in names:
+            transport.add_city(name)
+        for route in routes:
+            transport.add_route(*route)
+
+        def run():
+            latencies = []
+            for start_name, end_name in pairs[:args.dsa_queries]:
+                start = time.perf_counter()
+                transport.find_time_priority_path(start_name, end_name)
+                latencies.append(time.perf_counter() - start)
+            return latencies
+        return run
+
+    results.append(run_benchmark('add_city', size, prepare_add_city, args.memory))
+    results.append(run_benchmark('add_route', size, prepare_add_route, args.memory))
+    results.append(run_benchmark('get_city', size, prepare_get_city, args.memory))
+
+    if size <= args.max_full_mesh:
+        results.append(run_benchmark('create_fully_connected_network', size, prepare_fully_connected,
+                                     args.memory))
+    else:
+        results.append(skipped('create_fully_connected_network', size,
+                               f"builds n^2/2 routes; limit is --max-full-mesh {args.max_full_mesh}"))
+
+    for priority in PRIORITIES:
+        results.append(run_benchmark(f'calculate_best_route[{priority}]', size,
+                                     prepare_best_route(priority), args.memory))
+
+    if dsa is None:
+        results.append(skipped('dsa.find_time_priority_path', size, f"{DSA_PATH} not found"))
+    elif size <= args.max_dsa:
+        results.append(run_benchmark('dsa.find_time_priority_path', size, prepare_dsa, args.memory))
+    else:
+        results.append(skipped('dsa.find_time_priority_path', size,
+                               f"DSA.py resolves every connection per search; limit is --max-dsa {args.max_dsa}"))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000,10000,100000',
+                        help="comma-separated network sizes (cities)")
+    parser.add_argument('--k', type=int, default=4, help="nearest neighbours per city")
+    parser.add_argument('--queries', type=int, default=50, help="route queries per size and priority")
+    parser.add_argument('--dsa-queries', type=int, default=5, help="DSA.py queries per size")
+    parser.add_argument('--max-full-mesh', type=int, default=1000)
+    parser.add_argument('--max-dsa', type=int, default=10000)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip the tracemalloc peak memory runs")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    dsa = load_dsa() if os.path.exists(DSA_PATH) else None
+    rng = random.Random(args.seed)
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(',')):
+        for result in benchmark_size(size, args, rng, dsa):
+            results.append(result)
+            # Progress goes to stderr so stdout stays valid JSON
+            if 'skipped' in result:
+                print(f"{result['benchmark']:<36} n={size:<7} skipped", file=sys.stderr)
+            else:
+                print(f"{result['benchmark']:<36} n={size:<7} {result['throughput_ops_s']:>14,.1f} ops/s"
+                      f"  p50 {result['latency_us']['p50']:>12,.1f} us", file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'k': args.k,
+        'queries': args.queries,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,56 +1,170 @@
 class MinHeap:
-    """Custom implementation of a min heap data structure."""
-    
-    def __init__(self):
-        self.heap = []
-    
-    def push(self, item):
-        """Add item to the heap and maintain the heap property."""
-        self.heap.append(item)
-        self._sift_up(len(self.heap) - 1)
-    
+    """Position-indexed d-ary min heap with decrease-key.
+
+    Entries are (key, priority) pairs with unique, hashable keys. The heap
+    tracks the slot of every key, so decrease_key runs in O(log n) without
+    pushing duplicate entries. Sifting is iterative, and the arity can be
+    raised (e.g. 4) to trade slightly more comparisons per level for a
+    shallower tree.
+    """
+
+    def __init__(self, arity=2):
+        if arity < 2:
+            raise ValueError("Heap arity must be at least 2")
+        self.arity = arity
+        self._keys = []
+        self._priorities = []
+        self._positions = {}  # key -> index in _keys/_priorities
+
+    def push(self, key, priority):
+        """Add a key with the given priority."""
+        if key in self._positions:
+            raise KeyError(f"Key {key!r} is already in the heap")
+        self._keys.append(key)
+        self._priorities.append(priority)
+        self._sift_up(len(self._keys) - 1, key, priority)
+
     def pop(self):
-        """Remove and return the smallest item from the heap."""
-        if not self.heap:
+        """Remove and return the (key, priority) pair with the smallest priority."""
+        keys = self._keys
+        if not keys:
             return None
-        
-        # Swap the root with the last element
-        self._swap(0, len(self.heap) - 1)
-        item = self.heap.pop()
-        
-        # Restore the heap property
-        if self.heap:
-            self._sift_down(0)
-        return item
-    
-    def _sift_up(self, index):
-        """Move an item up the heap to maintain the heap property."""
-        parent = (index - 1) // 2
-        
-        if index > 0 and self.heap[parent][0] > self.heap[index][0]:
-            self._swap(index, parent)
-            self._sift_up(parent)
-    
-    def _sift_down(self, index):
-        """Move an item down the heap to maintain the heap property."""
-        smallest = index
-        left = 2 * index + 1
-        right = 2 * index + 2
-        
-        if left < len(self.heap) and self.heap[left][0] < self.heap[smallest][0]:
-            smallest = left
-            
-        if right < len(self.heap) and self.heap[right][0] < self.heap[smallest][0]:
-            smallest = right
-            
-        if smallest != index:
-            self._swap(index, smallest)
-            self._sift_down(smallest)
-    
-    def _swap(self, i, j):
-        """Swap two items in the heap."""
-        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
-    
+
+        priorities = self._priorities
+        key = keys[0]
+        priority = priorities[0]
+        del self._positions[key]
+
+        # Move the last entry to the root and restore the heap property
+        last_key = keys.pop()
+        last_priority = priorities.pop()
+        if keys:
+            self._sift_down(0, last_key, last_priority)
+        return key, priority
+
+    def peek(self):
+        """Return the (key, priority) pair with the smallest priority without removing it."""
+        if not self._keys:
+            return None
+        return self._keys[0], self._priorities[0]
+
+    def decrease_key(self, key, priority):
+        """Lower the priority of a key already in the heap.
+
+        Returns False, leaving the heap untouched, if the new priority is not lower.
+        """
+        index = self._positions[key]
+        if priority >= self._priorities[index]:
+            return False
+        self._sift_up(index, key, priority)
+        return True
+
+    def push_or_decrease(self, key, priority):
+        """Push a new key, or lower its priority if it is already queued."""
+        if key in self._positions:
+            return self.decrease_key(key, priority)
+        self.push(key, priority)
+        return True
+
+    def priority(self, key):
+        """Return the current priority of a queued key."""
+        return self._priorities[self._positions[key]]
+
+    def _sift_up(self, index, key, priority):
+        """Move an entry up from index until its parent is not larger."""
+        keys = self._keys
+        priorities = self._priorities
+        positions = self._positions
+        arity = self.arity
+
+        while index > 0:
+            parent = (index - 1) // arity
+            parent_priority = priorities[parent]
+            if parent_priority <= priority:
+                break
+            # Shift the parent down instead of swapping on every level
+            parent_key = keys[parent]
+            keys[index] = parent_key
+            priorities[index] = parent_priority
+            positions[parent_key] = index
+            index = parent
+
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
+
+    def _sift_down(self, index, key, priority):
+        """Move an entry down from index until no child is smaller."""
+        keys = self._keys
+        priorities = self._priorities
+        positions = self._positions
+        arity = self.arity
+        size = len(keys)
+
+        while True:
+            first_child = index * arity + 1
+            if first_child >= size:
+                break
+
+            # Find the smallest child
+            smallest = first_child
+            smallest_priority = priorities[first_child]
+            for child in range(first_child + 1, min(first_child + arity, size)):
+                if priorities[child] < smallest_priority:
+                    smallest = child
+                    smallest_priority = priorities[child]
+
+            if smallest_priority >= priority:
+                break
+            child_key = keys[smallest]
+            keys[index] = child_key
+            priorities[index] = smallest_priority
+            positions[child_key] = index
+            index = smallest
+
+        keys[index] = key
+        priorities[index] = priority
+        positions[key] = index
+
     def is_empty(self):
         """Check if the heap is empty."""
-        return len(self.heap) == 0
\ No newline at end of file
+        return not self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+
+class CountingMinHeap(MinHeap):
+    """MinHeap that counts its operations and tracks its peak size.
+
+    Used instead of MinHeap only when search metrics are enabled, so the
+    plain heap carries no counting overhead.
+    """
+
+    def __init__(self, arity=2):
+        super().__init__(arity)
+        self.pushes = 0
+        self.pops = 0
+        self.decreases = 0
+        self.peak_size = 0
+
+    def push(self, key, priority):
+        super().push(key, priority)
+        self.pushes += 1
+        if len(self._keys) > self.peak_size:
+            self.peak_size = len(self._keys)
+
+    def pop(self):
+        item = super().pop()
+        if item is not None:
+            self.pops += 1
+        return item
+
+    def decrease_key(self, key, priority):
+        decreased = super().decrease_key(key, priority)
+        if decreased:
+            self.decreases += 1
+        return decreased
@@ -1,17 +1,10 @@
-from models.transport_system import TransportSystem
-from utils.network_generator import create_fully_connected_network
+from api_handlers import open_ledger, open_transport
 
 def main():
     """Main function to run the transport system."""
-    transport = TransportSystem()
-    
-    # Add cities
-    cities = ['Coimbatore', 'Palakkad', 'Chennai', 'Bangalore', 'Mumbai', 'Delhi']
-    for city in cities:
-        transport.add_city(city)
-    
-    # Create a fully connected network
-    transport = create_fully_connected_network(transport)
+    # Start from the saved network snapshot, creating it with the default network on first run
+    transport = open_transport()
+    transport.ledger = open_ledger()
 
     transport.show_cities()
 
@@ -35,6 +28,7 @@ def main():
     print(f"Optimization: {priority.capitalize()}")
     
     transport.book_trip(start_city, end_city, priority)
+    transport.ledger.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,197 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+
+class BookingLedger:
+    """Append-only NDJSON ledger of bookings with monotonic booking references.
+
+    Every booking gets the next integer ID, so references never collide, and
+    is appended as one JSON line. A background thread group-commits pending
+    bookings: it numbers everything queued since its last fsync and writes it
+    in one write and one fsync, and record() returns once the booking is
+    durable. Batches are numbered and written under an exclusive flock on the
+    file, after reading the last ID from its end whenever another process has
+    appended to it, so several processes can share one ledger. A record torn
+    by a crash is truncated. With no path the ledger only keeps records in
+    memory.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.last_id = 0  # Last ID handed out
+        self.durable_id = 0  # Last ID known to be on disk
+        self.batches = 0  # fsync batches written
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pending = []  # Entries waiting for the writer to number and write them
+        self._queued = 0  # Entries handed to the writer so far
+        self._written = 0  # Entries the writer has made durable
+        self._memory = [] if path is None else None
+        self._closed = False
+        self._error = None
+        self._file = None
+        self._size = 0  # File size after our last write, to notice other writers
+        self._writer = None
+
+        if path is not None:
+            self._file = open(path, 'a+b')
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                self.last_id = self.durable_id = self._recover()
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._writer = threading.Thread(target=self._write_loop, name='booking-ledger', daemon=True)
+            self._writer.start()
+
+    @staticmethod
+    def reference(booking_id):
+        """Format a booking ID as its booking reference."""
+        return f"BK{booking_id:05d}"
+
+    def record(self, booking):
+        """Append one booking dict; returns its booking reference once durable."""
+        return self.record_many([booking])[0]
+
+    def record_many(self, bookings):
+        """Append several bookings with a single durability wait; returns their references."""
+        entries = []
+        with self._lock:
+            if self._closed:
+                raise ValueError("Booking ledger is closed")
+            for booking in bookings:
+                # The ID and reference are filled in when the entry is numbered
+                entry = {'id': None, 'booking_ref': None, 'recorded_at': round(time.time(), 3)}
+                entry.update(booking)
+                entries.append(entry)
+
+            if self._memory is not None:
+                self._number(entries, self.last_id)
+                self._memory.extend(entries)
+                self.last_id += len(entries)
+                self.durable_id = self.last_id
+                return [entry['booking_ref'] for entry in entries]
+
+            # Wake the writer and wait until a batch containing our last entry is synced
+            self._pending.extend(entries)
+            self._queued += len(entries)
+            target = self._queued
+            self._changed.notify_all()
+            while self._written < target:
+                if self._error is not None:
+                    raise OSError(f"Booking ledger write failed: {self._error}")
+                self._changed.wait()
+        return [entry['booking_ref'] for entry in entries]
+
+    def records(self):
+        """Yield every recorded booking in ID order."""
+        if self._memory is not None:
+            yield from list(self._memory)
+            return
+        with open(self.path, 'rb') as handle:
+            for line in handle:
+                if line.endswith(b'\n'):
+                    yield json.loads(line)
+
+    def stats(self):
+        """Return the ledger counters as a dict."""
+        with self._lock:
+            return {
+                'path': self.path,
+                'last_id': self.last_id,
+                'durable_id': self.durable_id,
+                'fsync_batches': self.batches
+            }
+
+    def close(self):
+        """Write out pending bookings and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._changed.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+            self._file.close()
+
+    def __len__(self):
+        return self.last_id
+
+    def _number(self, entries, last_id):
+        """Give entries the IDs and references following last_id."""
+        for entry in entries:
+            last_id += 1
+            entry['id'] = last_id
+            entry['booking_ref'] = self.reference(last_id)
+
+    def _write_loop(self):
+        """Group commit: number, write and fsync everything queued since the last batch."""
+        fileno = self._file.fileno()
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._changed.wait()
+                if not self._pending:
+                    return
+                batch = self._pending
+                self._pending = []
+                last_id = self.last_id
+
+            try:
+                # Other processes append under the same lock; pick up their last ID first
+                fcntl.flock(fileno, fcntl.LOCK_EX)
+                try:
+                    if os.fstat(fileno).st_size != self._size:
+                        last_id = self._recover()
+                    self._number(batch, last_id)
+                    lines = [json.dumps(entry, separators=(',', ':')) + '\n' for entry in batch]
+                    self._file.write(''.join(lines).encode('utf-8'))
+                    self._file.flush()
+                    os.fsync(fileno)
+                    self._size = self._file.tell()
+                finally:
+                    fcntl.flock(fileno, fcntl.LOCK_UN)
+            except OSError as error:
+                with self._lock:
+                    self._error = error
+                    self._changed.notify_all()
+                return
+
+            with self._lock:
+                self.last_id = self.durable_id = batch[-1]['id']
+                self._written += len(batch)
+                self.batches += 1
+                self._changed.notify_all()
+
+    def _recover(self):
+        """Return the last ID in the locked ledger file, truncating a torn final record."""
+        handle = self._file
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+
+        # Anything after the last newline was torn by a crash mid-write
+        end = self._last_newline(handle, size)
+        if end + 1 != size:
+            handle.truncate(end + 1)
+        self._size = end + 1
+        if end < 0:
+            return 0
+
+        start = self._last_newline(handle, end) + 1
+        handle.seek(start)
+        return json.loads(handle.read(end - start))['id']
+
+    @staticmethod
+    def _last_newline(handle, before):
+        """Return the offset of the last newline before an offset, or -1."""
+        position = before
+        while position > 0:
+            block = min(65536, position)
+            position -= block
+            handle.seek(position)
+            index = handle.read(block).rfind(b'\n')
+            if index >= 0:
+                return position + index
+        return -1
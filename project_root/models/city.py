@@ -1,15 +1,177 @@
+from array import array
+from collections.abc import Sequence
+
+# Comfort classes in code order; edges store the index instead of the name
+COMFORT_CLASSES = ['Economy', 'Standard', 'Premium', 'Express']
+_COMFORT_CODES = {name: code for code, name in enumerate(COMFORT_CLASSES)}
+
+# Codes are stored in array('B'), so at most 256 classes can be registered
+MAX_COMFORT_CLASSES = 256
+
+
+def comfort_code(comfort):
+    """Return the integer code of a comfort class, registering new classes up to MAX_COMFORT_CLASSES."""
+    code = _COMFORT_CODES.get(comfort)
+    if code is None:
+        if not isinstance(comfort, str):
+            raise ValueError(f"Comfort class must be a string, not {comfort!r}")
+        if len(COMFORT_CLASSES) >= MAX_COMFORT_CLASSES:
+            raise ValueError(f"Too many comfort classes; cannot register {comfort!r}")
+        code = len(COMFORT_CLASSES)
+        COMFORT_CLASSES.append(comfort)
+        _COMFORT_CODES[comfort] = code
+    return code
+
+
 class City:
-    """Represents a city in the transportation network."""
-    
-    def __init__(self, name):
+    """Represents a city in the transportation network.
+
+    Outgoing edges are stored column-wise in typed arrays: destination city
+    IDs, comfort class codes, costs and durations. ``connections`` presents
+    them as the familiar (destination, comfort, cost, duration) tuples.
+    A hash index from destination ID to edge position, built on first use,
+    makes duplicate checks and edge updates O(1).
+
+    Connections to names that are not registered cities are kept as plain
+    tuples after the edges, as before, but are not part of the route network.
+    """
+
+    __slots__ = ('name', 'city_id', 'coordinates', 'registry',
+                 'neighbor_ids', 'comfort_codes', 'costs', 'durations', '_edge_index', 'unresolved')
+
+    def __init__(self, name, coordinates=None):
         self.name = name
-        self.connections = []  # List of (destination, comfort, cost, duration)
-        self.next_city = None
-    
-    def add_connection(self, destination, comfort, cost, duration):
+        self.city_id = None  # Assigned by CityRegistry
+        self.coordinates = coordinates  # (latitude, longitude) or None
+        self.registry = None  # CityRegistry that resolves neighbour IDs to cities
+        self.neighbor_ids = array('i')  # Destination city IDs
+        self.comfort_codes = array('B')  # COMFORT_CLASSES indexes
+        self.costs = array('d')
+        self.durations = array('d')
+        self._edge_index = None  # Destination ID -> edge position, built on first lookup
+        self.unresolved = ()  # (destination, comfort, cost, duration) to unregistered names; rarely used
+
+    @property
+    def connections(self):
+        """Read-only view of the edges as (destination, comfort, cost, duration) tuples."""
+        return ConnectionsView(self)
+
+    @property
+    def next_city(self):
+        """The city registered after this one, or None; replaces the old linked-list pointer."""
+        if self.registry is None or self.city_id + 1 >= len(self.registry):
+            return None
+        return self.registry.get_by_id(self.city_id + 1)
+
+    def add_connection(self, destination, comfort, cost, duration, upsert=False):
+        """
+        Add a connection to a city by name; returns False if it already exists.
+        With upsert, an existing connection takes the new comfort, cost and
+        duration instead, and True is returned if any of them changed.
+        """
+        destination_city = self.registry.get(destination) if self.registry is not None else None
+        if destination_city is None:
+            return self._add_unresolved(destination, comfort, cost, duration, upsert)
+
         # Check if connection already exists
-        for dest, _, _, _ in self.connections:
-            if dest.lower() == destination.lower():
-                return False
-        self.connections.append((destination, comfort, cost, duration))
-        return True
\ No newline at end of file
+        position = self.edge_position(destination_city.city_id)
+        if position is None:
+            self.add_edge(destination_city.city_id, comfort_code(comfort), cost, duration)
+            return True
+        if upsert:
+            return self.update_edge(position, comfort_code(comfort), cost, duration)
+        return False
+
+    def _add_unresolved(self, destination, comfort, cost, duration, upsert):
+        """Keep a connection to a name that is not a registered city."""
+        connection = (destination, comfort, cost, duration)
+        for position, (other, _, _, _) in enumerate(self.unresolved):
+            if other.lower() == destination.lower():
+                if not upsert or self.unresolved[position] == connection:
+                    return False
+                self.unresolved = self.unresolved[:position] + (connection,) + self.unresolved[position + 1:]
+                return True
+        self.unresolved += (connection,)
+        return True
+
+    def edge_position(self, destination_id):
+        """Return the position of the edge to a city ID, or None if there is none."""
+        if self._edge_index is None:
+            self._edge_index = {neighbor_id: position for position, neighbor_id in enumerate(self.neighbor_ids)}
+        return self._edge_index.get(destination_id)
+
+    def add_edge(self, destination_id, code, cost, duration):
+        """Append an edge by destination ID and comfort code without a duplicate check."""
+        # Validate everything first so a bad value never leaves the arrays different lengths
+        code, cost, duration = self._edge_values(code, cost, duration)
+        if self._edge_index is not None:
+            self._edge_index[destination_id] = len(self.neighbor_ids)
+        self.neighbor_ids.append(destination_id)
+        self.comfort_codes.append(code)
+        self.costs.append(cost)
+        self.durations.append(duration)
+
+    def update_edge(self, position, code, cost, duration):
+        """Overwrite the edge at a position; returns True if any value changed."""
+        code, cost, duration = self._edge_values(code, cost, duration)
+        if (self.comfort_codes[position], self.costs[position], self.durations[position]) == (code, cost, duration):
+            return False
+        self.comfort_codes[position] = code
+        self.costs[position] = cost
+        self.durations[position] = duration
+        return True
+
+    @staticmethod
+    def _edge_values(code, cost, duration):
+        """Check a comfort code and convert cost and duration to floats, raising ValueError."""
+        if not isinstance(code, int) or not 0 <= code < len(COMFORT_CLASSES):
+            raise ValueError(f"Invalid comfort code: {code!r}")
+        try:
+            return code, float(cost), float(duration)
+        except (TypeError, ValueError):
+            raise ValueError(f"Cost and duration must be numbers, got {cost!r} and {duration!r}") from None
+
+
+class ConnectionsView(Sequence):
+    """Sequence of a city's edges decoded to (destination, comfort, cost, duration) tuples."""
+
+    __slots__ = ('_city',)
+
+    def __init__(self, city):
+        self._city = city
+
+    def __len__(self):
+        return len(self._city.neighbor_ids) + len(self._city.unresolved)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        city = self._city
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("connection index out of range")
+        if index >= len(city.neighbor_ids):
+            return city.unresolved[index - len(city.neighbor_ids)]
+        return (city.registry.get_by_id(city.neighbor_ids[index]).name,
+                COMFORT_CLASSES[city.comfort_codes[index]],
+                city.costs[index], city.durations[index])
+
+    def __iter__(self):
+        city = self._city
+        for destination_id, code, cost, duration in zip(city.neighbor_ids, city.comfort_codes,
+                                                        city.costs, city.durations):
+            yield (city.registry.get_by_id(destination_id).name, COMFORT_CLASSES[code], cost, duration)
+        yield from city.unresolved
+
+    def __eq__(self, other):
+        # Compares like the list of tuples it replaces
+        if isinstance(other, (ConnectionsView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ConnectionsView({list(self)!r})"
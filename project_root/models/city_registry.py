@@ -0,0 +1,52 @@
+class CityRegistry:
+    """Hash-indexed store of cities with stable insertion order and integer IDs."""
+
+    def __init__(self):
+        self._cities = []  # City objects indexed by city_id
+        self._index = {}  # casefolded name -> City
+
+    @staticmethod
+    def normalize(name):
+        """Return the lookup key used for a city name."""
+        return name.casefold()
+
+    def add(self, city):
+        """Register a city, assigning it the next integer ID.
+
+        Returns the city, or None if a city with the same name already exists.
+        """
+        key = self.normalize(city.name)
+        if key in self._index:
+            return None
+
+        city.city_id = len(self._cities)
+        city.registry = self
+        self._cities.append(city)
+        self._index[key] = city
+        return city
+
+    def get(self, name):
+        """Get a city by name (case-insensitive) in O(1)."""
+        return self._index.get(self.normalize(name))
+
+    def get_by_id(self, city_id):
+        """Get a city by its integer ID."""
+        return self._cities[city_id]
+
+    def id_of(self, name):
+        """Return the integer ID of a city, or None if it is unknown."""
+        city = self.get(name)
+        return city.city_id if city else None
+
+    def names(self):
+        """Return all city names in insertion order."""
+        return [city.name for city in self._cities]
+
+    def __contains__(self, name):
+        return self.normalize(name) in self._index
+
+    def __iter__(self):
+        return iter(self._cities)
+
+    def __len__(self):
+        return len(self._cities)
@@ -0,0 +1,149 @@
+import math
+from array import array
+from models.city import COMFORT_CLASSES
+from utils.distance_calculator import haversine_km
+
+
+class GraphSnapshot:
+    """Compressed sparse row (CSR) view of the route network.
+
+    The outgoing edges of city ``i`` occupy positions ``offsets[i]`` up to
+    ``offsets[i + 1]`` of the parallel edge arrays, so a search can walk
+    neighbours by integer ID without touching City objects or name strings.
+    """
+
+    def __init__(self, names, offsets, targets, costs, durations, comfort_codes,
+                 price_factors, comfort_scores, latitudes, longitudes, version=0):
+        self.names = names  # City names indexed by city ID
+        self.offsets = offsets  # array('q'), length num_cities + 1
+        self.targets = targets  # array('i') of neighbour city IDs
+        self.costs = costs  # array('d') of base costs
+        self.durations = durations  # array('d') of base durations
+        self.comfort_codes = comfort_codes  # array('B') of COMFORT_CLASSES indexes
+        self.price_factors = price_factors  # array('d') indexed by comfort code
+        self.comfort_scores = comfort_scores  # array('d') indexed by comfort code
+        self.latitudes = latitudes  # array('d') indexed by city ID, NaN if unknown
+        self.longitudes = longitudes  # array('d') indexed by city ID, NaN if unknown
+        self.version = version
+        self._index = None
+        self._geo_minimums = None  # Raw geo_bounds minimums, inf without positive-length edges
+
+    @classmethod
+    def build(cls, registry, comfort_levels, version=0):
+        """Build a snapshot from a CityRegistry and a comfort level table."""
+        names = []
+        offsets = array('q', [0])
+        targets = array('i')
+        costs = array('d')
+        durations = array('d')
+        comfort_codes = array('B')
+        latitudes = array('d')
+        longitudes = array('d')
+
+        for city in registry:
+            names.append(city.name)
+            latitude, longitude = city.coordinates or (math.nan, math.nan)
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+            # City edges are already typed arrays, so each copies in one call
+            targets.extend(city.neighbor_ids)
+            costs.extend(city.costs)
+            durations.extend(city.durations)
+            comfort_codes.extend(city.comfort_codes)
+            offsets.append(len(targets))
+
+        price_factors, comfort_scores = cls.comfort_tables(comfort_levels)
+        return cls(names, offsets, targets, costs, durations, comfort_codes,
+                   price_factors, comfort_scores, latitudes, longitudes, version)
+
+    @staticmethod
+    def comfort_tables(comfort_levels):
+        """Return (price factors, comfort scores) arrays indexed by comfort code."""
+        # Per-class factors are looked up once here instead of per relaxation
+        price_factors = array('d')
+        comfort_scores = array('d')
+        for comfort in COMFORT_CLASSES:
+            level = comfort_levels.get(comfort)
+            price_factors.append(level['price_factor'] if level else 1.0)
+            comfort_scores.append(level['comfort_score'] if level else 0)
+        return price_factors, comfort_scores
+
+    @property
+    def num_cities(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    def city_id(self, name):
+        """Return the ID of a city by name (case-insensitive), or None."""
+        if self._index is None:
+            self._index = {city_name.casefold(): i for i, city_name in enumerate(self.names)}
+        return self._index.get(name.casefold())
+
+    def edges(self, city_id):
+        """Return the range of edge indexes leaving a city."""
+        return range(self.offsets[city_id], self.offsets[city_id + 1])
+
+    def has_coordinates(self):
+        """Check whether every city has known coordinates."""
+        return not any(math.isnan(latitude) for latitude in self.latitudes)
+
+    def geo_distance(self, city1, city2):
+        """Great-circle distance in kilometers between two cities by ID."""
+        return haversine_km(self.latitudes[city1], self.longitudes[city1],
+                            self.latitudes[city2], self.longitudes[city2])
+
+    def geo_bounds(self):
+        """
+        Return (min base duration per km, min priced cost per km) over all edges,
+        measured against great-circle distance, or None without coordinates.
+
+        Every edge weight is at least its great-circle length times these
+        ratios, so they turn straight-line distances into admissible lower
+        bounds for A*.
+        """
+        if self._geo_minimums is None:
+            if not self.has_coordinates():
+                return None
+            all_edges = ((city_id, edge) for city_id in range(self.num_cities) for edge in self.edges(city_id))
+            self._geo_minimums = self._fold_geo_minimums(all_edges, math.inf, math.inf)
+        min_duration, min_cost = self._geo_minimums
+        # A network without any positive-length edge gives no usable bound
+        return (
+            0.0 if min_duration == math.inf else min_duration,
+            0.0 if min_cost == math.inf else min_cost
+        )
+
+    def carry_geo_bounds(self, previous, changes):
+        """
+        Take geo_bounds over from the previous snapshot of the same network,
+        folding in only the edges changed since, given as (source city ID,
+        edge position) pairs. Edges that got dearer keep their old, lower
+        ratio, which is still an admissible bound. Nothing is carried if the
+        previous bounds were never computed or the price factors differ.
+        """
+        if previous._geo_minimums is None or previous.price_factors != self.price_factors:
+            return
+        # Cities of the previous snapshot had coordinates; check the new ones
+        if any(math.isnan(latitude) for latitude in self.latitudes[previous.num_cities:]):
+            return
+        changed_edges = ((source, self.offsets[source] + position) for source, position in changes)
+        self._geo_minimums = self._fold_geo_minimums(changed_edges, *previous._geo_minimums)
+
+    def _fold_geo_minimums(self, edges, min_duration, min_cost):
+        """Lower (min duration per km, min priced cost per km) by (source city ID, edge index) pairs."""
+        for city_id, edge in edges:
+            distance = self.geo_distance(city_id, self.targets[edge])
+            if distance <= 0:
+                continue
+            cost = self.costs[edge] * self.price_factors[self.comfort_codes[edge]]
+            min_duration = min(min_duration, self.durations[edge] / distance)
+            min_cost = min(min_cost, cost / distance)
+        return min_duration, min_cost
+
+    def nbytes(self):
+        """Return the memory used by the CSR arrays in bytes."""
+        return sum(a.itemsize * len(a) for a in (
+            self.offsets, self.targets, self.costs, self.durations, self.comfort_codes))
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+
+from models.transport_system import TransportSystem
+
+# Search-only transport system of a worker process, built once by _init_worker
+_worker_transport = None
+
+
+def _init_worker(graph, traffic_seed, comfort_levels):
+    """Receive the network snapshot once per worker instead of once per task."""
+    global _worker_transport
+    _worker_transport = TransportSystem.from_snapshot(graph, traffic_seed, comfort_levels)
+
+
+def _route_chunk(task):
+    """Route one chunk of (start_id, end_id) pairs, searching once per start city."""
+    pairs, priority, epoch = task
+    by_start = {}  # start ID -> destination IDs
+    for start_id, end_id in pairs:
+        if start_id is not None and end_id is not None:
+            by_start.setdefault(start_id, set()).add(end_id)
+
+    routes = {}
+    for start_id, end_ids in by_start.items():
+        for end_id, result in _worker_transport.routes_from_id(start_id, end_ids, priority, epoch).items():
+            routes[(start_id, end_id)] = result
+    return [routes.get(pair) for pair in pairs]
+
+
+class ParallelRouter:
+    """Routes large batches of origin/destination pairs on a pool of worker processes.
+
+    The network snapshot is shipped to each worker once through the pool
+    initializer; tasks only carry city IDs. A memory-mapped snapshot travels
+    as its file path, so every worker maps the same pages. Pairs are split
+    into chunks, each chunk searches once per start city, and results stream
+    back in input order. The router answers for the network as it was when
+    it was created.
+    """
+
+    def __init__(self, transport, workers=None, chunk_size=256, context=None):
+        self.transport = transport
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        graph = transport.snapshot()
+        self.graph = graph
+        self.version = graph.version
+        mp_context = multiprocessing.get_context(context)
+        self._pool = mp_context.Pool(self.workers, initializer=_init_worker,
+                                     initargs=(graph, transport.traffic.seed, transport.comfort_levels))
+
+    def route_pairs(self, pairs, priority="time", epoch=None):
+        """
+        Yield the result of every (start, end) name pair in input order.
+        Each result matches calculate_best_route with Dijkstra, or is None if
+        either city is unknown or there is no route.
+        """
+        if epoch is None:
+            epoch = self.transport.traffic.current_epoch()
+        city_id = self.transport.city_id
+        id_pairs = ((city_id(start, self.graph), city_id(end, self.graph)) for start, end in pairs)
+        tasks = ((chunk, priority, epoch) for chunk in self._chunks(id_pairs))
+        for results in self._pool.imap(_route_chunk, tasks):
+            yield from results
+
+    def _chunks(self, items):
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def close(self):
+        """Stop the worker processes."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
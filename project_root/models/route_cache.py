@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RouteCache:
+    """Bounded LRU cache of route results with time-to-live expiry.
+
+    Entries are tagged with the network version they were computed for; the
+    first lookup after the version changes drops every entry.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl  # Seconds an entry stays valid
+        self.clock = clock
+        self.version = None
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, version):
+        """Return the cached result for key, or None on a miss."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, result = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result, version):
+        """Store a result computed for the given network version."""
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self.clock() + self.ttl, result)
+            self._entries.move_to_end(key)
+
+            # Evict least recently used entries beyond the size bound
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self, version):
+        """Drop all entries if the network changed since they were stored."""
+        if version != self.version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self.version = version
+
+    def stats(self):
+        """Return the cache counters as a dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def __len__(self):
+        return len(self._entries)
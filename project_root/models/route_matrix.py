@@ -0,0 +1,194 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the all-pairs matrix
+    np = None
+
+
+def numpy_available():
+    """Check whether the optional NumPy dependency is installed."""
+    return np is not None
+
+
+class RouteMatrix:
+    """All-pairs best scores for one priority and traffic epoch.
+
+    scores[i, j] is the best route score from city i to city j (inf when
+    unreachable) and predecessor[i, j] is the city visited just before j on
+    that route (-1 when unreachable or i == j).
+    """
+
+    def __init__(self, names, priority, epoch, version, scores, predecessor):
+        self.names = names
+        self.priority = priority
+        self.epoch = epoch
+        self.version = version
+        self.scores = scores
+        self.predecessor = predecessor
+
+    @property
+    def size(self):
+        return len(self.names)
+
+    def copy(self):
+        return RouteMatrix(list(self.names), self.priority, self.epoch, self.version,
+                           self.scores.copy(), self.predecessor.copy())
+
+    def add_cities(self, names):
+        """Append cities that have no routes yet, unreachable from and to every other city."""
+        n = self.size
+        size = n + len(names)
+        scores = np.full((size, size), np.inf)
+        scores[:n, :n] = self.scores
+        new_ids = np.arange(n, size)
+        scores[new_ids, new_ids] = 0
+        predecessor = np.full((size, size), -1, dtype=self.predecessor.dtype)
+        predecessor[:n, :n] = self.predecessor
+        self.names = self.names + list(names)
+        self.scores = scores
+        self.predecessor = predecessor
+
+    def relax_edge(self, source_id, target_id, weight):
+        """
+        Account for a new or cheaper edge in O(n^2) instead of recomputing:
+        every route it improves runs through it. Returns the improved pair count.
+        """
+        through = self.scores[:, source_id, None] + weight + self.scores[None, target_id, :]
+        improved = through < self.scores
+        count = int(np.count_nonzero(improved))
+        if count:
+            # Past the edge, improved routes follow target_id's own best routes
+            via = self.predecessor[target_id].copy()
+            via[target_id] = source_id
+            self.scores[improved] = through[improved]
+            self.predecessor[improved] = np.broadcast_to(via, self.scores.shape)[improved]
+        return count
+
+    def route(self, start_id, end_id):
+        """Return the city IDs on the best route, or None if unreachable."""
+        if np.isinf(self.scores[start_id, end_id]):
+            return None
+        route = [end_id]
+        while route[-1] != start_id and len(route) <= self.size:
+            route.append(int(self.predecessor[start_id, route[-1]]))
+        route.reverse()
+        return route
+
+    def tile(self, row_start, col_start, tile_size):
+        """Return a square block of scores as nested lists, with None for unreachable pairs."""
+        block = self.scores[row_start:row_start + tile_size, col_start:col_start + tile_size]
+        return [[None if np.isinf(value) else round(float(value), 2) for value in row] for row in block]
+
+
+def edge_weights(graph, priority, traffic_factors, weekend_discount):
+    """Vectorized per-edge scores, matching the scoring used by the route search."""
+    codes = np.frombuffer(graph.comfort_codes, dtype=np.uint8)
+    durations = np.frombuffer(graph.durations, dtype=np.float64)
+    factors = np.frombuffer(traffic_factors, dtype=np.float64)
+
+    if priority == "cost":
+        costs = np.frombuffer(graph.costs, dtype=np.float64)
+        price_factors = np.frombuffer(graph.price_factors, dtype=np.float64)
+        return costs * weekend_discount * price_factors[codes]
+    if priority == "comfort":
+        comfort_scores = np.frombuffer(graph.comfort_scores, dtype=np.float64)
+        return (5 - comfort_scores[codes]) * 0.8 + durations * factors * 0.2
+    return durations * factors
+
+
+def compute_route_matrix(graph, priority, epoch, traffic_factors, weekend_discount,
+                         block_size=256, method=None):
+    """
+    Compute all-pairs best scores for a priority.
+
+    Dense networks use a vectorized Floyd-Warshall. Sparse networks run one
+    one-to-all search per source, vectorized across a block of sources at a
+    time. Method can force "floyd_warshall" or "one_to_all".
+    """
+    if np is None:
+        raise RuntimeError("The route matrix requires NumPy (pip install numpy)")
+
+    n = graph.num_cities
+    offsets = np.frombuffer(graph.offsets, dtype=np.int64)
+    sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(offsets))
+    targets = np.frombuffer(graph.targets, dtype=np.int32)
+    weights = edge_weights(graph, priority, traffic_factors, weekend_discount)
+
+    if method is None:
+        # Floyd-Warshall costs n^3 regardless of density, one-to-all about n * E per round
+        method = "floyd_warshall" if len(targets) * 16 >= n * n else "one_to_all"
+
+    if method == "floyd_warshall":
+        scores, predecessor = _floyd_warshall(n, sources, targets, weights, block_size)
+    else:
+        scores, predecessor = _one_to_all(n, sources, targets, weights, block_size)
+    return RouteMatrix(list(graph.names), priority, epoch, graph.version, scores, predecessor)
+
+
+def _floyd_warshall(n, sources, targets, weights, block_size):
+    """Floyd-Warshall where each pivot relaxes a block of rows at once."""
+    # Dense adjacency: direct edge scores, 0 on the diagonal, inf elsewhere
+    scores = np.full((n, n), np.inf)
+    np.minimum.at(scores, (sources, targets), weights)
+    np.fill_diagonal(scores, 0.0)
+
+    predecessor = np.full((n, n), -1, dtype=np.int32)
+    predecessor[sources, targets] = sources
+    np.fill_diagonal(predecessor, -1)
+
+    for k in range(n):
+        through_k = scores[k]
+        for row_start in range(0, n, block_size):
+            rows = slice(row_start, row_start + block_size)
+            candidate = scores[rows, k, None] + through_k
+            improved = candidate < scores[rows]
+            if improved.any():
+                np.copyto(scores[rows], candidate, where=improved)
+                np.copyto(predecessor[rows], predecessor[k], where=improved)
+    return scores, predecessor
+
+
+def _one_to_all(n, sources, targets, weights, block_size):
+    """
+    One-to-all searches for a block of sources at a time.
+
+    Every round relaxes all edges for all sources in the block with a single
+    gather and a segmented minimum over edges grouped by target, until no
+    score improves.
+    """
+    # Group edges by target so np.minimum.reduceat finds the best incoming edge
+    order = np.argsort(targets, kind='stable')
+    edge_sources = sources[order]
+    edge_targets = targets[order]
+    edge_weights_sorted = weights[order]
+    reached, segment_starts = np.unique(edge_targets, return_index=True)
+
+    scores = np.full((n, n), np.inf)
+    predecessor = np.full((n, n), -1, dtype=np.int32)
+
+    for row_start in range(0, n, block_size):
+        row_ids = np.arange(row_start, min(row_start + block_size, n))
+        columns = np.arange(len(row_ids))
+        # Transposed block (city x source) keeps the per-edge gathers contiguous
+        block = np.full((n, len(row_ids)), np.inf)
+        block[row_ids, columns] = 0.0
+
+        while len(edge_targets):
+            candidate = block[edge_sources] + edge_weights_sorted[:, None]
+            best = np.minimum.reduceat(candidate, segment_starts, axis=0)
+            current = block[reached]
+            if not (best < current).any():
+                break
+            block[reached] = np.minimum(current, best)
+
+        # The predecessor of j is any u whose edge into j achieves the final score
+        block_predecessor = np.full(block.shape, -1, dtype=np.int32)
+        for edge_start in range(0, len(edge_targets), 4096):
+            edges = slice(edge_start, edge_start + 4096)
+            tight = block[edge_sources[edges]] + edge_weights_sorted[edges, None] == block[edge_targets[edges]]
+            tight_edges, tight_sources = np.nonzero(tight)
+            block_predecessor[edge_targets[edges][tight_edges], tight_sources] = edge_sources[edges][tight_edges]
+        block_predecessor[row_ids, columns] = -1
+
+        scores[row_ids] = block.T
+        predecessor[row_ids] = block_predecessor.T
+    return scores, predecessor
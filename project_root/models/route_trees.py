@@ -0,0 +1,258 @@
+import math
+import threading
+from collections import OrderedDict
+from data_structures.min_heap import MinHeap
+
+
+def edge_score(graph, priority, code, cost, duration, traffic_factor, weekend_discount):
+    """Score of one edge, computed exactly like the route search computes it."""
+    if priority == "cost":
+        return cost * weekend_discount * graph.price_factors[code]
+    if priority == "comfort":
+        comfort_score = 5 - graph.comfort_scores[code]
+        return (comfort_score * 0.8) + (duration * traffic_factor * 0.2)
+    return duration * traffic_factor
+
+
+class RouteTree:
+    """Best-route tree from one source city for one priority and traffic epoch.
+
+    Parents are stored as (previous city ID, position in that city's edge
+    list). Cities only ever append edges, so positions stay valid across
+    network versions even though CSR edge indexes shift.
+    """
+
+    def __init__(self, source_id, priority, epoch, version, scores, parent):
+        self.source_id = source_id
+        self.priority = priority
+        self.epoch = epoch
+        self.version = version  # Network version the tree is exact for
+        self.scores = scores  # city ID -> best score from the source
+        self.parent = parent  # city ID -> (previous city ID, edge position), None for the source
+
+    def came_from(self, graph, end_id):
+        """Return the search-style came_from mapping for the route to end_id."""
+        came_from = {self.source_id: None}
+        city_id = end_id
+        while city_id != self.source_id:
+            previous_id, position = self.parent[city_id]
+            came_from[city_id] = (previous_id, graph.offsets[previous_id] + position)
+            city_id = previous_id
+        return came_from
+
+
+class RouteTrees:
+    """Shortest-path trees for the hottest source cities, kept fresh across edits.
+
+    A source gets a full tree once it has been looked up hot_after times for
+    the same priority and epoch. With max_trees trees kept, a newly hot source
+    only replaces the least recently used tree if it has been looked up more
+    often; a tree of another epoch is always replaced first. So more hot
+    sources than trees keep the same trees instead of evicting each other
+    and rebuilding in turn. Lookup counts are halved every max_lookups
+    lookups, which bounds them and lets old popularity fade. A max_trees of
+    0 turns the trees off. When the network changes, a tree is brought
+    up to date from the transport system's edge change log: added edges and
+    edges whose score went down only relax the cities whose score improves,
+    while a higher score on a tree edge, or a change log that no longer
+    reaches back far enough, rebuilds the tree with a full search.
+
+    Published trees are never modified: builds and repairs run outside the
+    lock on a copy that is swapped in when done, and lookups for a source
+    whose tree is being updated fall back to their own search instead of
+    waiting for it.
+    """
+
+    def __init__(self, max_trees=8, hot_after=4, max_lookups=16 * 1024):
+        self.max_trees = max_trees
+        self.hot_after = hot_after
+        self.max_lookups = max_lookups
+        self._trees = OrderedDict()  # (source ID, priority, epoch) -> RouteTree, least recently used first
+        self._lookups = {}  # (source ID, priority, epoch) -> lookups, halved every max_lookups lookups
+        self._counted = 0  # Lookups since the counts were last halved
+        self._updating = set()  # Keys whose tree is being built or repaired
+        self._lock = threading.Lock()
+
+        self.built = 0
+        self.refused = 0  # Lookups of hot sources left to a search because the trees were used more
+        self.repaired = 0
+        self.rebuilt = 0
+        self.repaired_cities = 0  # Cities whose score a repair improved
+
+    def paths(self, transport, graph, source_id, end_ids, priority, epoch):
+        """
+        Return {end_id: came_from mapping, or None if unreachable} read from the
+        source's tree brought up to date with this graph, or None if the source
+        is not hot yet or its tree is being updated by another thread.
+        """
+        tree = self._tree(transport, graph, source_id, priority, epoch)
+        if tree is None:
+            return None
+        return {end_id: tree.came_from(graph, end_id) if end_id in tree.scores else None
+                for end_id in end_ids}
+
+    def _tree(self, transport, graph, source_id, priority, epoch):
+        """Return the tree for a source at this graph's version, building or repairing it if needed."""
+        key = (source_id, priority, epoch)
+        with self._lock:
+            lookups = self._count(key)
+            tree = self._trees.get(key)
+            if tree is not None and tree.version == graph.version:
+                self._trees.move_to_end(key)
+                return tree
+            if key in self._updating:
+                return None
+            if tree is None:
+                if lookups < self.hot_after or not self._admit(key, lookups):
+                    return None
+            elif tree.version > graph.version:
+                # The caller holds an older snapshot than the tree
+                return None
+            self._updating.add(key)
+
+        # The search runs without the lock, so lookups of other sources never wait for it
+        updated = None
+        repaired_cities = None
+        try:
+            if tree is not None:
+                updated, repaired_cities = self._repair(transport, graph, tree)
+            if updated is None:
+                updated = self._build(transport, graph, source_id, priority, epoch)
+        finally:
+            with self._lock:
+                self._updating.discard(key)
+                if updated is not None:
+                    if tree is None:
+                        self.built += 1
+                    elif repaired_cities is None:
+                        self.rebuilt += 1
+                    else:
+                        self.repaired += 1
+                        self.repaired_cities += repaired_cities
+                    current = self._trees.get(key)
+                    if current is None or current.version < updated.version:
+                        self._trees[key] = updated
+                    self._trees.move_to_end(key)
+                    while len(self._trees) > self.max_trees:
+                        del self._trees[self._victim(epoch)]
+        return updated
+
+    def _count(self, key):
+        """Count a lookup and return the key's count (lock held)."""
+        lookups = self._lookups.get(key, 0) + 1
+        self._lookups[key] = lookups
+        self._counted += 1
+        if self._counted >= self.max_lookups:
+            # Halve every count, dropping keys looked up only once
+            self._lookups = {other: count // 2 for other, count in self._lookups.items() if count > 1}
+            self._counted = 0
+        return lookups
+
+    def _victim(self, epoch):
+        """Return the key of the tree to replace first: the least recently used of another epoch, else of all."""
+        for key in self._trees:
+            if key[2] != epoch:
+                return key
+        return next(iter(self._trees))
+
+    def _admit(self, key, lookups):
+        """Check whether a newly hot source gets a tree (lock held)."""
+        if len(self._trees) < self.max_trees:
+            return True
+        if self.max_trees > 0:
+            victim = self._victim(key[2])
+            if victim[2] != key[2] or lookups > self._lookups.get(victim, 0):
+                return True
+        self.refused += 1
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._trees.clear()
+            self._lookups.clear()
+            self._counted = 0
+
+    def stats(self):
+        """Return the tree counters as a dict."""
+        with self._lock:
+            return {
+                'trees': len(self._trees),
+                'max_trees': self.max_trees,
+                'hot_after': self.hot_after,
+                'built': self.built,
+                'refused': self.refused,
+                'repaired': self.repaired,
+                'rebuilt': self.rebuilt,
+                'repaired_cities': self.repaired_cities
+            }
+
+    @staticmethod
+    def _build(transport, graph, source_id, priority, epoch):
+        """Grow a complete tree from the source with one full search."""
+        _, traffic_factors = transport.traffic.edge_traffic(graph, epoch)
+        came_from, _, scores = transport._search_tree(graph, source_id, None, priority,
+                                                      transport.traffic.weekend_discount(epoch), traffic_factors)
+        offsets = graph.offsets
+        parent = {city_id: None if step is None else (step[0], step[1] - offsets[step[0]])
+                  for city_id, step in came_from.items()}
+        return RouteTree(source_id, priority, epoch, graph.version, scores, parent)
+
+    @staticmethod
+    def _repair(transport, graph, tree):
+        """
+        Apply the edge changes since the tree's version to a copy of it.
+        Returns (repaired tree, cities improved), or (None, None) if the tree
+        has to be rebuilt instead.
+        """
+        changes = transport.edge_changes(tree.version, graph.version)
+        if changes is None:
+            return None, None
+
+        _, traffic_factors = transport.traffic.edge_traffic(graph, tree.epoch)
+        weekend_discount = transport.traffic.weekend_discount(tree.epoch)
+        priority = tree.priority
+        offsets = graph.offsets
+        targets = graph.targets
+        # Readers may hold the published tree, so the repair works on copies
+        scores = dict(tree.scores)
+        parent = dict(tree.parent)
+
+        def score_of(edge):
+            return edge_score(graph, priority, graph.comfort_codes[edge], graph.costs[edge],
+                              graph.durations[edge], traffic_factors[edge], weekend_discount)
+
+        # Seed the queue with every city a new or cheaper edge improves
+        queue = MinHeap(arity=4)
+        for _, source_id, position, old_values in changes:
+            edge = offsets[source_id] + position
+            dest_id = targets[edge]
+            weight = score_of(edge)
+            if old_values is not None:
+                old_weight = edge_score(graph, priority, *old_values, traffic_factors[edge], weekend_discount)
+                if weight > old_weight:
+                    if parent.get(dest_id) == (source_id, position):
+                        return None, None  # A tree edge got worse
+                    continue  # Other routes never depended on it
+            if source_id not in scores:
+                continue  # Not reachable (yet); relaxed later if a repair reaches it
+            new_score = scores[source_id] + weight
+            if new_score < scores.get(dest_id, math.inf):
+                scores[dest_id] = new_score
+                parent[dest_id] = (source_id, position)
+                queue.push_or_decrease(dest_id, new_score)
+
+        # Dijkstra restricted to the cities whose score improves
+        improved = 0
+        while not queue.is_empty():
+            city_id, score = queue.pop()
+            improved += 1
+            start = offsets[city_id]
+            for edge in range(start, offsets[city_id + 1]):
+                dest_id = targets[edge]
+                new_score = score + score_of(edge)
+                if new_score < scores.get(dest_id, math.inf):
+                    scores[dest_id] = new_score
+                    parent[dest_id] = (city_id, edge - start)
+                    queue.push_or_decrease(dest_id, new_score)
+
+        return RouteTree(tree.source_id, priority, tree.epoch, graph.version, scores, parent), improved
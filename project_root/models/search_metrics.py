@@ -0,0 +1,99 @@
+import bisect
+import threading
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+EXPANSION_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+class Histogram:
+    """Fixed-bucket histogram; each bucket counts observations up to its bound."""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket is the overflow
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def as_dict(self):
+        buckets = [{'le': bound, 'count': count} for bound, count in zip(self.bounds, self.counts)]
+        buckets.append({'le': 'inf', 'count': self.counts[-1]})
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'min': None if self.min is None else round(self.min, 3),
+            'max': None if self.max is None else round(self.max, 3),
+            'buckets': buckets
+        }
+
+
+class SearchMetrics:
+    """Per-priority aggregates of route search counters and timings.
+
+    TransportSystem only records into this when metrics are enabled; with
+    metrics disabled the search uses the plain heap and skips the timer.
+    """
+
+    COUNTERS = ('expanded', 'visited', 'reached', 'edges_scanned', 'heap_pushes', 'heap_pops',
+                'heap_decreases')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._priorities = {}  # priority -> aggregate dict
+
+    def record(self, priority, algorithm, elapsed, stats, found):
+        """Record one search: wall time in seconds and its counters dict."""
+        with self._lock:
+            aggregate = self._priorities.get(priority)
+            if aggregate is None:
+                aggregate = {
+                    'searches': 0,
+                    'not_found': 0,
+                    'algorithms': {},
+                    'totals': dict.fromkeys(self.COUNTERS, 0),
+                    'peak_queue': 0,
+                    'latency_ms': Histogram(LATENCY_BUCKETS_MS),
+                    'expansions': Histogram(EXPANSION_BUCKETS)
+                }
+                self._priorities[priority] = aggregate
+
+            aggregate['searches'] += 1
+            if not found:
+                aggregate['not_found'] += 1
+            aggregate['algorithms'][algorithm] = aggregate['algorithms'].get(algorithm, 0) + 1
+            totals = aggregate['totals']
+            for name in self.COUNTERS:
+                totals[name] += stats[name]
+            aggregate['peak_queue'] = max(aggregate['peak_queue'], stats['peak_queue'])
+            aggregate['latency_ms'].observe(elapsed * 1000)
+            aggregate['expansions'].observe(stats['expanded'])
+
+    def reset(self):
+        with self._lock:
+            self._priorities.clear()
+
+    def as_dict(self):
+        """Return the aggregates per priority as plain data."""
+        with self._lock:
+            return {
+                priority: {
+                    'searches': aggregate['searches'],
+                    'not_found': aggregate['not_found'],
+                    'algorithms': dict(aggregate['algorithms']),
+                    'totals': dict(aggregate['totals']),
+                    'peak_queue': aggregate['peak_queue'],
+                    'latency_ms': aggregate['latency_ms'].as_dict(),
+                    'expansions': aggregate['expansions'].as_dict()
+                }
+                for priority, aggregate in self._priorities.items()
+            }
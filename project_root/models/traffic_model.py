@@ -0,0 +1,89 @@
+import datetime
+import random
+import threading
+from array import array
+from collections import namedtuple
+
+# Traffic levels in code order; per-edge traffic is stored as the index
+TRAFFIC_LEVELS = ('low', 'moderate', 'high')
+
+# Time bucket that traffic is drawn for: one calendar day split into
+# rush hour and off-peak
+TrafficEpoch = namedtuple('TrafficEpoch', ['day', 'weekend', 'rush_hour'])
+
+
+class TrafficModel:
+    """Seedable traffic model that assigns every edge a traffic level per epoch.
+
+    An edge's level is a hash of the model seed, the epoch and the edge's two
+    cities, so the same query in the same time bucket always sees the same
+    traffic and its result can be cached, and adding a route leaves the
+    traffic on every other route unchanged. Level arrays are built once per
+    (epoch, network version); graphs that provide shared_traffic (memory-mapped
+    snapshots) supply them instead, so processes can share one copy.
+    """
+
+    def __init__(self, seed=0, clock=datetime.datetime.now, max_cached=4):
+        self.seed = seed
+        self.clock = clock
+        self.max_cached = max_cached
+        self._cache = {}  # (epoch, graph version) -> (levels, factors)
+        self._lock = threading.Lock()  # Guards _cache for concurrent searches
+
+    def current_epoch(self, now=None):
+        """Return the epoch for a datetime (defaults to the model clock)."""
+        if now is None:
+            now = self.clock()
+        weekend = now.weekday() in [5, 6]
+        is_rush_hour = 7 <= now.hour <= 9 or 17 <= now.hour <= 19
+        return TrafficEpoch(now.date().isoformat(), weekend, is_rush_hour)
+
+    @staticmethod
+    def conditions(epoch):
+        """Traffic factors based on time of day and weekday/weekend."""
+        return {
+            'low': 0.8 if not epoch.weekend else 0.9,
+            'moderate': 1.0 if not epoch.weekend else 1.1,
+            'high': 1.3 if not epoch.rush_hour else 1.6
+        }
+
+    @staticmethod
+    def weekend_discount(epoch):
+        """Price multiplier applied to every segment during the epoch."""
+        return 0.9 if epoch.weekend else 1.0
+
+    def edge_traffic(self, graph, epoch):
+        """Return (levels, factors) arrays indexed by the graph's edge indexes."""
+        key = (epoch, graph.version)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        shared_traffic = getattr(graph, 'shared_traffic', None)
+        if shared_traffic is not None:
+            levels, factors = shared_traffic(self, epoch)
+        else:
+            levels, factors = self.compute_edge_traffic(graph, epoch)
+
+        # Keep only the most recent epochs
+        with self._lock:
+            if key not in self._cache and len(self._cache) >= self.max_cached:
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = (levels, factors)
+        return levels, factors
+
+    def compute_edge_traffic(self, graph, epoch):
+        """Compute new (levels, factors) arrays for every edge of a graph."""
+        salt = random.Random(f"{self.seed}:{epoch.day}:{epoch.weekend}:{epoch.rush_hour}").getrandbits(64)
+        level_count = len(TRAFFIC_LEVELS)
+        offsets = graph.offsets
+        targets = graph.targets
+        # Integer tuple hashes are deterministic, unlike str hashes
+        levels = array('B', [hash((salt, source_id, targets[edge])) % level_count
+                             for source_id in range(graph.num_cities)
+                             for edge in range(offsets[source_id], offsets[source_id + 1])])
+
+        conditions = self.conditions(epoch)
+        level_factors = [conditions[level] for level in TRAFFIC_LEVELS]
+        factors = array('d', [level_factors[level] for level in levels])
+        return levels, factors
@@ -1,71 +1,51 @@
-import datetime
+import math
 import random
-from models.city import City
-from utils.distance_calculator import get_distance
+import threading
+import time
+from contextlib import contextmanager
+from data_structures.min_heap import CountingMinHeap, MinHeap
+from models.booking_ledger import BookingLedger
+from models.city import City, COMFORT_CLASSES, comfort_code
+from models.city_registry import CityRegistry
+from models.graph_snapshot import GraphSnapshot
+from models.route_cache import RouteCache
+from models.route_matrix import compute_route_matrix
+from models.route_trees import RouteTrees, edge_score
+from models.search_metrics import SearchMetrics
+from models.traffic_model import TrafficModel, TRAFFIC_LEVELS
+from utils.distance_calculator import get_coordinates, get_distance
 
-class MinHeap:
-    """Custom implementation of a min heap data structure."""
-    
-    def __init__(self):
-        self.heap = []
-    
-    def push(self, item):
-        """Add item to the heap and maintain the heap property."""
-        self.heap.append(item)
-        self._sift_up(len(self.heap) - 1)
-    
-    def pop(self):
-        """Remove and return the smallest item from the heap."""
-        if not self.heap:
-            return None
-        
-        # Swap the root with the last element
-        self._swap(0, len(self.heap) - 1)
-        item = self.heap.pop()
-        
-        # Restore the heap property
-        if self.heap:
-            self._sift_down(0)
-        
-        return item
-    
-    def _sift_up(self, index):
-        """Move an item up the heap to maintain the heap property."""
-        parent = (index - 1) // 2
-        
-        if index > 0 and self.heap[parent][0] > self.heap[index][0]:
-            self._swap(index, parent)
-            self._sift_up(parent)
-    
-    def _sift_down(self, index):
-        """Move an item down the heap to maintain the heap property."""
-        smallest = index
-        left = 2 * index + 1
-        right = 2 * index + 2
-        
-        if left < len(self.heap) and self.heap[left][0] < self.heap[smallest][0]:
-            smallest = left
-            
-        if right < len(self.heap) and self.heap[right][0] < self.heap[smallest][0]:
-            smallest = right
-            
-        if smallest != index:
-            self._swap(index, smallest)
-            self._sift_down(smallest)
-    
-    def _swap(self, i, j):
-        """Swap two items in the heap."""
-        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
-    
-    def is_empty(self):
-        """Check if the heap is empty."""
-        return len(self.heap) == 0
+# Directed edge changes kept for bringing route trees and matrices up to date;
+# dependents older than the log recompute from scratch
+MAX_EDGE_CHANGES = 4096
+
+# Search algorithms calculate_best_route accepts
+ALGORITHMS = ("dijkstra", "astar")
 
 class TransportSystem:
-    """Manages a linked list of cities and routes between them."""
+    """Manages a linked list of cities and routes between them.
+
+    Searches read immutable, versioned GraphSnapshots. Writers change the
+    cities under a write lock and the next snapshot is published by swapping
+    one reference, so readers never see a half-applied change. Writers also
+    log the edges they add or change, so route trees and route matrices can
+    be updated incrementally instead of recomputed.
+    """
     
     def __init__(self):
         self.head = None
+        self.registry = CityRegistry()
+        self.version = 0  # Bumped whenever cities or routes change
+        self._snapshot = None  # Last published GraphSnapshot
+        self._write_lock = threading.RLock()
+        # (oldest version the log covers, [(version, source ID, edge position, old values or None)])
+        self._edge_log = (0, [])
+        self.traffic = TrafficModel()
+        self.route_cache = RouteCache()
+        self._route_matrices = {}  # (priority, epoch) -> RouteMatrix
+        self.route_trees = RouteTrees()
+        self.metrics = None  # SearchMetrics while metrics are enabled
+        self.ledger = None  # BookingLedger that assigns booking references
         self.comfort_levels = {
             'Economy': {'price_factor': 1.0, 'satisfaction': 'Basic comfort', 'comfort_score': 1},
             'Standard': {'price_factor': 1.3, 'satisfaction': 'Comfortable journey', 'comfort_score': 2},
@@ -73,150 +53,673 @@ class TransportSystem:
             'Express': {'price_factor': 1.5, 'satisfaction': 'Fast service', 'comfort_score': 3}
         }
         
-    def add_city(self, name):
-        """Add a city to the transport system."""
-        # Check if city already exists
-        if self.get_city(name):
-            return False
-            
-        city = City(name)
+    @classmethod
+    def from_snapshot(cls, graph, traffic_seed=0, comfort_levels=None):
+        """
+        Build a search-only transport system around a prebuilt snapshot.
+        It has no City objects; searches look city names up in the snapshot.
+        """
+        transport = cls()
+        if comfort_levels is not None:
+            transport.comfort_levels = comfort_levels
+        transport.traffic = TrafficModel(seed=traffic_seed)
+        transport.version = graph.version
+        transport._snapshot = graph
+        return transport
+
+    @classmethod
+    def restore(cls, graph, traffic_seed=0, comfort_levels=None):
+        """
+        Rebuild a complete transport system, City objects included, from a snapshot.
+        Each city's edge arrays are sliced straight from the CSR arrays and the
+        snapshot itself is published as is, so nothing is searched or recomputed.
+        """
+        transport = cls.from_snapshot(graph, traffic_seed, comfort_levels)
+        for city_id, name in enumerate(graph.names):
+            latitude = graph.latitudes[city_id]
+            coordinates = None if math.isnan(latitude) else (latitude, graph.longitudes[city_id])
+            city = City(name, coordinates)
+            if transport.registry.add(city) is None:
+                raise ValueError(f"Duplicate city in snapshot: {name}")
+
+            start, end = graph.offsets[city_id], graph.offsets[city_id + 1]
+            city.neighbor_ids = graph.targets[start:end]
+            city.comfort_codes = graph.comfort_codes[start:end]
+            city.costs = graph.costs[start:end]
+            city.durations = graph.durations[start:end]
+
+            if not transport.head:
+                transport.head = city
+        return transport
+
+    def add_city(self, name, coordinates=None):
+        """
+        Add a city to the transport system.
+        Coordinates are (latitude, longitude); known cities are looked up if omitted.
+        """
+        with self._write_lock:
+            if not self._register_city(name, coordinates):
+                return False
+            self.version += 1
+            return True
+
+    def add_cities(self, cities):
+        """
+        Add many cities at once from (name, coordinates) pairs.
+        Existing names are skipped; returns the number of cities added.
+        """
+        with self._write_lock:
+            added = 0
+            for name, coordinates in cities:
+                if self._register_city(name, coordinates):
+                    added += 1
+            if added:
+                self.version += 1
+            return added
+
+    def _register_city(self, name, coordinates):
+        """Register a city after the last one; returns None if it exists."""
+        if coordinates is None:
+            coordinates = get_coordinates(name)
+
+        # Registering fails if the city already exists
+        city = self.registry.add(City(name, coordinates))
+        if not city:
+            return None
+
+        # Callers walk head/next_city; next_city follows registry order
         if not self.head:
             self.head = city
-        else:
-            temp = self.head
-            while temp.next_city:
-                temp = temp.next_city
-            temp.next_city = city
-        return True
-
-    def add_route(self, start, end, comfort, cost, duration):
-        """Add a bidirectional route between two cities."""
-        origin = self.get_city(start)
-        destination = self.get_city(end)
+        return city
+
+    def add_route(self, start, end, comfort, cost, duration, upsert=False):
+        """
+        Add a bidirectional route between two cities.
+        With upsert, an existing route takes the new comfort, cost and duration.
+        """
+        with self._write_lock:
+            origin = self.get_city(start)
+            destination = self.get_city(end)
         
-        if not origin or not destination:
-            return False
+            if not origin or not destination:
+                return False
             
-        # Add bidirectional connection
-        origin.add_connection(end, comfort, cost, duration)
-        destination.add_connection(start, comfort, cost, duration)
-        return True
+            # Add bidirectional connection
+            code = comfort_code(comfort)
+            changes = []
+            for city, other in ((origin, destination), (destination, origin)):
+                change = self._write_edge(city, other.city_id, code, cost, duration, upsert)
+                if change is not None:
+                    changes.append(change)
+            if changes:
+                self._commit_changes(changes)
+            return True
 
-    def get_city(self, name):
-        """Get a city by name."""
-        temp = self.head
-        while temp:
-            if temp.name.lower() == name.lower():
-                return temp
-            temp = temp.next_city
+    def add_routes(self, routes, upsert=False):
+        """
+        Add many bidirectional routes at once from (start, end, comfort, cost, duration) tuples.
+        Routes between unknown cities are skipped, and so are existing routes
+        unless upsert is set, which updates them instead; returns the number of
+        routes added or changed. An invalid comfort class, cost or duration
+        raises ValueError after the routes before it have been added.
+        """
+        with self._write_lock:
+            get_city = self.registry.get
+
+            added = 0
+            changes = []
+            try:
+                for start, end, comfort, cost, duration in routes:
+                    origin = get_city(start)
+                    destination = get_city(end)
+                    if not origin or not destination:
+                        continue
+
+                    new_route = False
+                    code = comfort_code(comfort)
+                    for city, other in ((origin, destination), (destination, origin)):
+                        change = self._write_edge(city, other.city_id, code, cost, duration, upsert)
+                        if change is None:
+                            continue
+                        new_route = True
+                        if changes is not None:
+                            changes.append(change)
+                            if len(changes) > MAX_EDGE_CHANGES:
+                                changes = None  # Too many to replay; dependents recompute
+                    if new_route:
+                        added += 1
+            finally:
+                # Publish the routes written so far even if an invalid one stops the batch
+                if added:
+                    self._commit_changes(changes)
+            return added
+
+    @staticmethod
+    def _write_edge(city, destination_id, code, cost, duration, upsert):
+        """
+        Add one directed edge, or with upsert update an existing one.
+        Returns the change as (source ID, edge position, old values or None), or None if nothing changed.
+        """
+        position = city.edge_position(destination_id)
+        if position is None:
+            city.add_edge(destination_id, code, cost, duration)
+            return (city.city_id, len(city.neighbor_ids) - 1, None)
+        if upsert:
+            old_values = (city.comfort_codes[position], city.costs[position], city.durations[position])
+            if city.update_edge(position, code, cost, duration):
+                return (city.city_id, position, old_values)
         return None
 
+    def _commit_changes(self, changes):
+        """Bump the version and log the edge changes under it (write lock held); None drops the log."""
+        self.version += 1
+        floor, entries = self._edge_log
+        if changes is None:
+            self._edge_log = (self.version, [])
+            return
+        entries.extend((self.version,) + change for change in changes)
+        if len(entries) > MAX_EDGE_CHANGES:
+            # Drop the oldest half, cutting between versions so the log stays complete
+            cut = len(entries) // 2
+            floor = entries[cut - 1][0]
+            while cut < len(entries) and entries[cut][0] == floor:
+                cut += 1
+            # Readers take the (floor, entries) pair in one read, so swap both at once
+            self._edge_log = (floor, entries[cut:])
+
+    def edge_changes(self, since_version, until_version):
+        """
+        Return the logged edge changes after since_version up to until_version
+        as (version, source ID, edge position, old (comfort code, cost, duration)
+        or None for a new edge), or None if the log does not reach back that far.
+        """
+        floor, entries = self._edge_log
+        if since_version < floor:
+            return None
+        return [entry for entry in entries if since_version < entry[0] <= until_version]
+
+    def get_city(self, name):
+        """Get a city by name; search-only systems built from a snapshot have none, use city_id()."""
+        return self.registry.get(name)
+
+    def get_city_by_id(self, city_id):
+        """Get a city by its integer ID."""
+        return self.registry.get_by_id(city_id)
+
+    def city_names(self):
+        """Return all city names in the order they were added."""
+        if not len(self.registry):
+            # Search-only systems built from a snapshot have no City objects
+            return list(self.snapshot().names)
+        return self.registry.names()
+
+    def city_id(self, name, graph=None):
+        """Return the ID of a city in a snapshot (default: the current one), or None if it is not in it."""
+        if graph is None:
+            graph = self.snapshot()
+        if not len(self.registry):
+            return graph.city_id(name)
+        city = self.registry.get(name)
+        if city is None or city.city_id >= graph.num_cities:
+            return None
+        return city.city_id
+
+    def snapshot(self):
+        """
+        Return the current immutable CSR snapshot of the network.
+        The fast path is a lock-free read of the published snapshot. After changes
+        the next snapshot is built and published first, unless a writer is still
+        busy; then the previous snapshot is returned, which is consistent.
+        """
+        graph = self._snapshot
+        if graph is not None and graph.version == self.version:
+            return graph
+
+        # Only the very first snapshot has to wait for a writer
+        if self._write_lock.acquire(blocking=graph is None):
+            try:
+                self._publish()
+            finally:
+                self._write_lock.release()
+        return self._snapshot
+
+    @contextmanager
+    def update(self):
+        """
+        Group changes into one atomic update: hold the write lock while the
+        block runs, then build and publish the next snapshot.
+        """
+        with self._write_lock:
+            yield self
+            self._publish()
+
+    def _publish(self):
+        """Build a snapshot of the current cities and swap it in (write lock held)."""
+        previous = self._snapshot
+        if previous is None or previous.version != self.version:
+            graph = GraphSnapshot.build(self.registry, self.comfort_levels, self.version)
+            if previous is not None:
+                # Fold only the logged edge changes into the previous A* bounds
+                changes = self.edge_changes(previous.version, self.version)
+                if changes is not None:
+                    graph.carry_geo_bounds(previous, [(source, position) for _, source, position, _ in changes])
+            self._snapshot = graph
+
+    def enable_metrics(self):
+        """Start recording per-search counters and timings; returns the SearchMetrics."""
+        if self.metrics is None:
+            self.metrics = SearchMetrics()
+        return self.metrics
+
+    def disable_metrics(self):
+        """Stop recording search metrics; searches run uninstrumented again."""
+        self.metrics = None
+
     def show_cities(self):
         """Display all cities in the system."""
-        if not self.head:
+        names = self.city_names()
+        if not names:
             print("\nNo cities available for booking.")
             return
             
-        temp = self.head
         print("\nCities Available For Booking:")
-        while temp:
-            print(f"- {temp.name}")
-            temp = temp.next_city
+        for name in names:
+            print(f"- {name}")
 
-    def calculate_best_route(self, start, end, priority="time"):
+    def calculate_best_route(self, start, end, priority="time", epoch=None, algorithm="dijkstra"):
         """
         Calculate the best route between two cities.
         Priority can be "time", "cost", or "comfort".
+        Algorithm can be "dijkstra" or "astar"; A* uses great-circle distances as
+        a lower bound and falls back to Dijkstra if a city has no coordinates.
+        Traffic comes from the traffic model for the given epoch (defaults to now),
+        so repeated queries in the same epoch return the same route. Results are
+        cached until the network changes; callers must not modify them. Dijkstra
+        queries from hot start cities are answered from their route trees.
         """
-        # Get city objects
-        start_city = self.get_city(start)
-        end_city = self.get_city(end)
-        
-        if not start_city or not end_city:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown search algorithm: {algorithm}")
+
+        # One snapshot serves the whole query; cities added after it was published are not in it yet
+        graph = self.snapshot()
+        start_id = self.city_id(start, graph)
+        end_id = self.city_id(end, graph)
+        if start_id is None or end_id is None:
             return None
-            
-        now = datetime.datetime.now()
-        weekend = now.weekday() in [5, 6]
-        is_rush_hour = 7 <= now.hour <= 9 or 17 <= now.hour <= 19
-
-        # Traffic factors based on time of day and weekday/weekend
-        traffic_conditions = {
-            'low': 0.8 if not weekend else 0.9,
-            'moderate': 1.0 if not weekend else 1.1,
-            'high': 1.3 if not is_rush_hour else 1.6
-        }
 
-        # Initialize the priority queue (custom heap)
-        priority_queue = MinHeap()
-        
-        # Format: (score, current_city_name, path, traffic_applied, costs, durations, comfort_levels)
-        priority_queue.push((0, start_city.name, [], [], [], [], []))
-        visited = {}
+        if epoch is None:
+            epoch = self.traffic.current_epoch()
 
-        while not priority_queue.is_empty():
-            score, current_name, path, traffic_applied, costs, durations, comforts = priority_queue.pop()
-
-            # Found the destination
-            if current_name.lower() == end_city.name.lower():
-                return {
-                    'total_duration': sum(durations),
-                    'total_cost': sum(costs),
-                    'route': path + [current_name],
-                    'traffic_applied': traffic_applied,
-                    'costs': costs,
-                    'durations': durations,
-                    'comfort_levels': comforts
-                }
-
-            # Skip if we've found a better path to this city already
-            if current_name in visited and visited[current_name] <= score:
+        # City IDs are the normalized form of the requested names
+        cache_key = (start_id, end_id, priority, epoch, algorithm)
+        result = self.route_cache.get(cache_key, graph.version)
+        if result is None:
+            paths = None
+            if algorithm == "dijkstra":
+                paths = self.route_trees.paths(self, graph, start_id, [end_id], priority, epoch)
+            if paths is not None:
+                result = self._route_from_path(graph, paths[end_id], end_id, epoch)
+            elif self.metrics is None:
+                result = self._search_route(start_id, end_id, priority, epoch, algorithm, graph=graph)
+            else:
+                result = self._measured_search(start_id, end_id, priority, epoch, algorithm, graph)
+            if result is not None:
+                self.route_cache.put(cache_key, result, graph.version)
+        return result
+
+    def calculate_routes_from(self, start, ends, priority="time", epoch=None):
+        """
+        Calculate the best routes from one city to many destinations with a single search.
+        Returns a dict mapping each requested destination name to its result dict,
+        or None if either city is unknown or there is no route. Results are the
+        same as calculate_best_route with Dijkstra and share its cache.
+        """
+        if epoch is None:
+            epoch = self.traffic.current_epoch()
+        graph = self.snapshot()
+        start_id = self.city_id(start, graph)
+
+        results = {}
+        pending = {}  # destination city ID -> requested names
+        for end in ends:
+            end_id = self.city_id(end, graph)
+            if start_id is None or end_id is None:
+                results[end] = None
                 continue
-                
-            visited[current_name] = score
-            path = path + [current_name]
+            cached = self.route_cache.get((start_id, end_id, priority, epoch, "dijkstra"), graph.version)
+            if cached is not None:
+                results[end] = cached
+            else:
+                pending.setdefault(end_id, []).append(end)
+
+        if not pending:
+            return results
+
+        # One tree from the start city answers every uncached destination; hot
+        # start cities keep theirs between calls
+        paths = self.route_trees.paths(self, graph, start_id, pending, priority, epoch)
+        if paths is not None:
+            routes = {end_id: self._route_from_path(graph, came_from, end_id, epoch)
+                      for end_id, came_from in paths.items()}
+        else:
+            routes = self.routes_from_id(start_id, pending, priority, epoch, graph)
+        for end_id, names in pending.items():
+            result = routes[end_id]
+            if result is not None:
+                self.route_cache.put((start_id, end_id, priority, epoch, "dijkstra"), result, graph.version)
+            for name in names:
+                results[name] = result
+        return results
+
+    def routes_from_id(self, start_id, end_ids, priority, epoch, graph=None):
+        """
+        Search once from a city ID and return {end_id: result dict or None}.
+        Bypasses the route cache; used for batches and by worker processes.
+        """
+        end_ids = set(end_ids)
+        weekend_discount = self.traffic.weekend_discount(epoch)
+        if graph is None:
+            graph = self.snapshot()
+        traffic_levels, traffic_factors = self.traffic.edge_traffic(graph, epoch)
+        stats = None if self.metrics is None else {}
+        started = time.perf_counter()
+        came_from, expanded, _ = self._search_tree(graph, start_id, end_ids, priority,
+                                                   weekend_discount, traffic_factors, stats=stats)
+        if stats is not None:
+            self.metrics.record(priority, "one_to_many", time.perf_counter() - started, stats,
+                                all(end_id in came_from for end_id in end_ids))
+
+        routes = {}
+        for end_id in end_ids:
+            result = None
+            if end_id in came_from:
+                result = self._reconstruct_route(graph, came_from, end_id, traffic_levels,
+                                                 traffic_factors, weekend_discount)
+                result['search'] = {'algorithm': "dijkstra", 'expanded': expanded, 'shared_by': len(end_ids)}
+            routes[end_id] = result
+        return routes
+
+    def _route_from_path(self, graph, came_from, end_id, epoch):
+        """Build the result dict for a route read from a route tree, or None without a route."""
+        if came_from is None:
+            return None
+        traffic_levels, traffic_factors = self.traffic.edge_traffic(graph, epoch)
+        result = self._reconstruct_route(graph, came_from, end_id, traffic_levels, traffic_factors,
+                                         self.traffic.weekend_discount(epoch))
+        result['search'] = {'algorithm': "dijkstra", 'expanded': 0, 'route_tree': True}
+        return result
+
+    def _measured_search(self, start_id, end_id, priority, epoch, algorithm, graph=None):
+        """Run the route search with counters and a timer, recording them in self.metrics."""
+        stats = {}
+        started = time.perf_counter()
+        result = self._search_route(start_id, end_id, priority, epoch, algorithm, stats, graph)
+        elapsed = time.perf_counter() - started
+        self.metrics.record(priority, stats['algorithm'], elapsed, stats, result is not None)
+        return result
+
+    def _search_route(self, start_id, end_id, priority, epoch, algorithm="dijkstra", stats=None, graph=None):
+        """
+        Run the route search between two city IDs; returns the result dict or None.
+        If a stats dict is given, it is filled with the search counters.
+        """
+        # Apply weekend discount if applicable
+        weekend_discount = self.traffic.weekend_discount(epoch)
+
+        # Search runs on the CSR arrays using integer city IDs
+        if graph is None:
+            graph = self.snapshot()
+        # Traffic factor of every edge for this epoch, precomputed once
+        traffic_levels, traffic_factors = self.traffic.edge_traffic(graph, epoch)
+
+        heuristic = None
+        if algorithm == "astar":
+            heuristic = self._geo_heuristic(graph, end_id, priority, epoch)
+        if heuristic is None:
+            algorithm = "dijkstra"
+
+        came_from, expanded, _ = self._search_tree(graph, start_id, {end_id}, priority, weekend_discount,
+                                                   traffic_factors, heuristic, stats)
+        if stats is not None:
+            stats['algorithm'] = algorithm
+        if end_id not in came_from:
+            return None  # No route found
+
+        result = self._reconstruct_route(graph, came_from, end_id, traffic_levels,
+                                         traffic_factors, weekend_discount)
+        result['search'] = {'algorithm': algorithm, 'expanded': expanded}
+        return result
+
+    def _search_tree(self, graph, start_id, targets, priority, weekend_discount, traffic_factors,
+                     heuristic=None, stats=None):
+        """
+        Grow the best-route tree from start_id until every target city is settled.
+
+        Targets is a set of city IDs, or None to settle every reachable city.
+        Returns (came_from, expanded, scores): came_from maps each reached city ID
+        to its (previous_city_id, edge_index), or None for the start; a target is
+        reachable exactly when it is in came_from (the search only runs out of
+        cities after settling everything it reached). Scores holds the best
+        score found for each reached city.
+        """
+        offsets = graph.offsets
+        dest_targets = graph.targets
+        base_costs = graph.costs
+        base_durations = graph.durations
+        comfort_codes = graph.comfort_codes
+        price_factors = graph.price_factors
+        comfort_scores = graph.comfort_scores
+        remaining = set(targets) if targets is not None else None
+
+        # Initialize the priority queue (indexed heap keyed by city ID).
+        # Queue priorities are score + heuristic; scores holds the best score so far.
+        # The counting heap is only used when the caller asked for stats
+        priority_queue = MinHeap(arity=4) if stats is None else CountingMinHeap(arity=4)
+        priority_queue.push(start_id, heuristic(start_id) if heuristic else 0)
+        scores = {start_id: 0}
+
+        # Predecessor of each reached city: (previous_city_id, edge_index)
+        came_from = {start_id: None}
+        settled = set()
+        expanded = 0
+
+        while not priority_queue.is_empty():
+            current_id, _ = priority_queue.pop()
+            score = scores[current_id]
+            expanded += 1
 
-            current_city = self.get_city(current_name)
-            for dest_name, comfort, cost, base_duration in current_city.connections:
-                # Skip cities we've already visited to avoid cycles
-                if dest_name in path:
+            # Stop once every target has its final route
+            if remaining is not None:
+                remaining.discard(current_id)
+                if not remaining:
+                    break
+
+            settled.add(current_id)
+
+            for edge in range(offsets[current_id], offsets[current_id + 1]):
+                dest_id = dest_targets[edge]
+                # Settled cities already have their best score, which also avoids cycles
+                if dest_id in settled:
                     continue
-                    
-                # Determine traffic condition based on time of day
-                traffic = random.choice(list(traffic_conditions.keys()))
-                traffic_factor = traffic_conditions[traffic]
-                
-                # Apply weekend discount if applicable
-                weekend_discount = 0.9 if weekend else 1.0
-                
-                # Apply comfort level price factor
-                comfort_factor = self.comfort_levels[comfort]['price_factor']
-                final_cost = cost * weekend_discount * comfort_factor
-                
-                # Calculate adjusted duration
-                adjusted_duration = base_duration * traffic_factor
+
+                traffic_factor = traffic_factors[edge]
                 
                 # Calculate score based on priority
                 if priority == "cost":
                     # Ensure cost is the primary priority
-                    new_score = score + final_cost
+                    new_score = score + base_costs[edge] * weekend_discount * price_factors[comfort_codes[edge]]
                 elif priority == "comfort":
                     # Higher comfort level = lower score (for min heap)
-                    comfort_score = 5 - self.comfort_levels[comfort]['comfort_score']
-                    new_score = score + (comfort_score * 0.8) + (adjusted_duration * 0.2)
+                    comfort_score = 5 - comfort_scores[comfort_codes[edge]]
+                    new_score = score + (comfort_score * 0.8) + (base_durations[edge] * traffic_factor * 0.2)
                 else:  # Default to time priority
-                    new_score = score + adjusted_duration
-                    
-                priority_queue.push((
-                    new_score, 
-                    dest_name, 
-                    path, 
-                    traffic_applied + [traffic], 
-                    costs + [final_cost], 
-                    durations + [adjusted_duration],
-                    comforts + [comfort]
-                ))
-
-        return None  # No route found
+                    new_score = score + base_durations[edge] * traffic_factor
+
+                # Remember only the predecessor edge; the route is rebuilt at the end
+                if dest_id not in scores or new_score < scores[dest_id]:
+                    scores[dest_id] = new_score
+                    came_from[dest_id] = (current_id, edge)
+                    priority_queue.push_or_decrease(
+                        dest_id, new_score + heuristic(dest_id) if heuristic else new_score)
+
+        if stats is not None:
+            self._search_stats(stats, graph, expanded, priority_queue, settled, scores)
+        return came_from, expanded, scores
+
+    @staticmethod
+    def _search_stats(stats, graph, expanded, priority_queue, settled, scores):
+        """Fill a stats dict from the state a finished search left behind."""
+        offsets = graph.offsets
+        stats.update({
+            'expanded': expanded,
+            'visited': len(settled),
+            'reached': len(scores),
+            # Only settled cities had their edges scanned
+            'edges_scanned': sum(offsets[city_id + 1] - offsets[city_id] for city_id in settled),
+            'heap_pushes': priority_queue.pushes,
+            'heap_pops': priority_queue.pops,
+            'heap_decreases': priority_queue.decreases,
+            'peak_queue': priority_queue.peak_size
+        })
+
+    def route_matrix(self, priority="time", epoch=None):
+        """
+        Return the all-pairs RouteMatrix for a priority and epoch (requires NumPy).
+        Matrices are cached. After routes are added or get cheaper, a copy is
+        patched edge by edge; other changes recompute the matrix.
+        """
+        if epoch is None:
+            epoch = self.traffic.current_epoch()
+
+        graph = self.snapshot()
+        key = (priority, epoch)
+        matrix = self._route_matrices.get(key)
+        if matrix is None or matrix.version != graph.version:
+            _, traffic_factors = self.traffic.edge_traffic(graph, epoch)
+            weekend_discount = self.traffic.weekend_discount(epoch)
+            patched = None
+            if matrix is not None and matrix.version < graph.version:
+                patched = self._patch_route_matrix(matrix, graph, traffic_factors, weekend_discount)
+            if patched is not None:
+                matrix = patched
+            else:
+                matrix = compute_route_matrix(graph, priority, epoch, traffic_factors, weekend_discount)
+            # Matrices for other epochs are never asked for again
+            self._route_matrices = {
+                cached_key: cached for cached_key, cached in self._route_matrices.items()
+                if cached_key[1] == epoch
+            }
+            self._route_matrices[key] = matrix
+        return matrix
+
+    def cached_route_matrix(self, priority="time", epoch=None):
+        """Return the cached RouteMatrix if it is up to date with the network, or None without computing one."""
+        if epoch is None:
+            epoch = self.traffic.current_epoch()
+        matrix = self._route_matrices.get((priority, epoch))
+        if matrix is None or matrix.version != self.snapshot().version:
+            return None
+        return matrix
+
+    def _patch_route_matrix(self, matrix, graph, traffic_factors, weekend_discount):
+        """
+        Return a copy of a matrix from an older network version updated with the
+        logged edge changes, or None if it has to be recomputed instead.
+        """
+        changes = self.edge_changes(matrix.version, graph.version)
+        # Each edge costs O(n^2); past n edges a fresh computation is no slower
+        if changes is None or len(changes) > graph.num_cities:
+            return None
+
+        edges = []
+        for _, source_id, position, old_values in changes:
+            edge = graph.offsets[source_id] + position
+            weight = edge_score(graph, matrix.priority, graph.comfort_codes[edge], graph.costs[edge],
+                                graph.durations[edge], traffic_factors[edge], weekend_discount)
+            if old_values is not None and weight > edge_score(graph, matrix.priority, *old_values,
+                                                              traffic_factors[edge], weekend_discount):
+                return None  # A costlier edge can lengthen routes
+            edges.append((source_id, graph.targets[edge], weight))
+
+        patched = matrix.copy()
+        if graph.num_cities > patched.size:
+            patched.add_cities(graph.names[patched.size:])
+        for source_id, target_id, weight in edges:
+            patched.relax_edge(source_id, target_id, weight)
+        patched.version = graph.version
+        return patched
+
+    def _geo_heuristic(self, graph, end_id, priority, epoch):
+        """
+        Build an A* heuristic estimating the remaining score to end_id.
+
+        Each edge's score is at least its great-circle length times the lowest
+        score per km on the network (with the best-case traffic factor for time
+        based scores), so the estimate never overshoots and stays consistent.
+        Returns None when coordinates are missing.
+        """
+        bounds = graph.geo_bounds()
+        if bounds is None:
+            return None
+        duration_per_km, cost_per_km = bounds
+        best_traffic = min(self.traffic.conditions(epoch).values())
+
+        if priority == "cost":
+            score_per_km = cost_per_km * self.traffic.weekend_discount(epoch)
+        elif priority == "comfort":
+            # The comfort term is positive, so only the duration part is bounded
+            score_per_km = duration_per_km * best_traffic * 0.2
+        else:
+            score_per_km = duration_per_km * best_traffic
+
+        estimates = {}
+
+        def heuristic(city_id):
+            estimate = estimates.get(city_id)
+            if estimate is None:
+                estimate = graph.geo_distance(city_id, end_id) * score_per_km
+                estimates[city_id] = estimate
+            return estimate
+
+        return heuristic
+
+    def _reconstruct_route(self, graph, came_from, end_id, traffic_levels, traffic_factors,
+                           weekend_discount):
+        """Rebuild the result dict of a search by walking predecessors back from end_id."""
+        route = []
+        traffic_applied = []
+        costs = []
+        durations = []
+        comfort_levels = []
+
+        current_id = end_id
+        while came_from[current_id] is not None:
+            previous_id, edge = came_from[current_id]
+            comfort = graph.comfort_codes[edge]
+
+            route.append(graph.names[current_id])
+            traffic_applied.append(TRAFFIC_LEVELS[traffic_levels[edge]])
+            # Apply weekend discount and comfort level price factor
+            costs.append(graph.costs[edge] * weekend_discount * graph.price_factors[comfort])
+            # Apply the epoch's traffic factor for this edge
+            durations.append(graph.durations[edge] * traffic_factors[edge])
+            comfort_levels.append(COMFORT_CLASSES[comfort])
+            current_id = previous_id
+        route.append(graph.names[current_id])
+
+        # Segments were collected from the destination backwards
+        for values in (route, traffic_applied, costs, durations, comfort_levels):
+            values.reverse()
+
+        return {
+            'total_duration': sum(durations),
+            'total_cost': sum(costs),
+            'route': route,
+            'traffic_applied': traffic_applied,
+            'costs': costs,
+            'durations': durations,
+            'comfort_levels': comfort_levels
+        }
 
     def book_trip(self, start, destination, priority="time"):
         """Book a trip between two cities with specified priority."""
@@ -232,14 +735,14 @@ class TransportSystem:
             print("\nError: Departure and destination cities cannot be the same.")
             return False
             
-        start_city = self.get_city(start)
-        end_city = self.get_city(destination)
+        # Resolve names through the snapshot, which search-only systems also have
+        graph = self.snapshot()
         
-        if not start_city:
+        if self.city_id(start, graph) is None:
             print(f"\nError: Departure city '{start}' not found in the system.")
             return False
             
-        if not end_city:
+        if self.city_id(destination, graph) is None:
             print(f"\nError: Destination city '{destination}' not found in the system.")
             return False
         
@@ -260,8 +763,18 @@ class TransportSystem:
             avg_comfort = sum(comfort_scores) / len(comfort_scores) if comfort_scores else 0
             comfort_rating = round(avg_comfort, 1)
             
-            # Generate booking reference
-            booking_ref = f"BK{random.randint(10000, 99999)}"
+            # Record the booking; without a configured ledger references only last for this session
+            if self.ledger is None:
+                self.ledger = BookingLedger()
+            booking_ref = self.ledger.record({
+                'departure': start,
+                'destination': destination,
+                'priority': priority,
+                'route': route,
+                'total_cost': total_cost,
+                'total_time': total_time,
+                'comfort_rating': comfort_rating
+            })
             
             print("\n===== BOOKING SUCCESSFUL =====")
             print(f"Booking Reference: {booking_ref}")
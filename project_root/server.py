@@ -2,27 +2,52 @@ from flask import Flask, request, jsonify, render_template, send_from_directory
 from flask_cors import CORS
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Import your existing transport system
-from models.transport_system import TransportSystem
-from utils.network_generator import create_fully_connected_network
+import api_handlers
+from models.route_matrix import numpy_available
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)  # Enable CORS for all routes
 
-# Create a global instance of the transport system
-transport = TransportSystem()
-
-# Initialize the transport system with cities
+# Initialize the transport system from the network snapshot (NETWORK_SNAPSHOT),
+# building and saving the default network on the first start. With NETWORK_MMAP=1
+# the snapshot is memory-mapped read-only, so several server processes share one graph
+# ROUTE_TREES sets how many route trees are kept for the hottest start cities (0 turns them off)
 def initialize_transport():
-    cities = ['Coimbatore', 'Palakkad', 'Chennai', 'Bangalore', 'Mumbai', 'Delhi']
-    for city in cities:
-        transport.add_city(city)
-    return create_fully_connected_network(transport)
+    if os.environ.get('NETWORK_MMAP') == '1':
+        return api_handlers.open_mapped_transport()
+    return api_handlers.open_transport()
 
 # Initialize on startup
 transport = initialize_transport()
 
+# Booking references come from the append-only ledger (BOOKING_LEDGER, empty for in-memory)
+ledger = api_handlers.open_ledger()
+
+# Search metrics are off unless ROUTE_METRICS=1; disabled searches run uninstrumented
+if os.environ.get('ROUTE_METRICS') == '1':
+    transport.enable_metrics()
+
+# Route matrix tiles: the default size, and the largest one a request may ask for
+DEFAULT_MATRIX_TILE = 64
+MAX_MATRIX_TILE = 256
+
+# Route matrices are computed on one background thread, so requests never wait for one
+matrix_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='route-matrix')
+matrix_jobs = {}  # (priority, epoch) -> Future of the matrix being computed
+matrix_jobs_lock = threading.Lock()
+
+def warm_route_matrix(priority, epoch):
+    """Start computing a route matrix in the background unless it is already underway"""
+    key = (priority, epoch)
+    with matrix_jobs_lock:
+        job = matrix_jobs.get(key)
+        if job is None or job.done():
+            matrix_jobs[key] = matrix_executor.submit(transport.route_matrix, priority, epoch)
+
 @app.route('/')
 def index():
     """Serve the main HTML page"""
@@ -31,89 +56,74 @@ def index():
 @app.route('/api/cities', methods=['GET'])
 def get_cities():
     """Return all available cities"""
-    cities = []
-    temp = transport.head
-    while temp:
-        cities.append(temp.name)
-        temp = temp.next_city
-    return jsonify(cities)
+    payload, status = api_handlers.list_cities(transport)
+    return jsonify(payload), status
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Return route cache hit, miss and eviction counters"""
+    return jsonify(transport.route_cache.stats())
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Return per-priority search counters with latency and expansion histograms"""
+    if transport.metrics is None:
+        return jsonify({"error": "Search metrics are disabled; set ROUTE_METRICS=1 to enable them"}), 404
+
+    return jsonify({
+        "searches": transport.metrics.as_dict(),
+        "cache": transport.route_cache.stats(),
+        "route_trees": transport.route_trees.stats()
+    })
+
+@app.route('/api/routes/matrix', methods=['GET'])
+def get_route_matrix():
+    """
+    Return a tile of the all-pairs route score matrix for a priority.
+    Answers 202 with Retry-After while the matrix is computed in the background.
+    """
+    if not numpy_available():
+        return jsonify({"error": "Route matrix requires NumPy on the server"}), 501
+
+    priority = request.args.get('priority', 'time')
+    if priority not in api_handlers.PRIORITIES:
+        return jsonify({"error": f"Priority must be one of: {', '.join(api_handlers.PRIORITIES)}"}), 400
+
+    row = request.args.get('row', 0, type=int)
+    col = request.args.get('col', 0, type=int)
+    tile = request.args.get('tile', DEFAULT_MATRIX_TILE, type=int)
+    if row < 0 or col < 0 or not 0 < tile <= MAX_MATRIX_TILE:
+        return jsonify({"error": f"row and col must be non-negative and tile between 1 and {MAX_MATRIX_TILE}"}), 400
+
+    # A matrix that is missing or older than the network is computed in the background
+    epoch = transport.traffic.current_epoch()
+    matrix = transport.cached_route_matrix(priority, epoch)
+    if matrix is None:
+        warm_route_matrix(priority, epoch)
+        return jsonify({"status": "computing", "priority": priority}), 202, {'Retry-After': '1'}
+
+    return jsonify({
+        "priority": priority,
+        "version": matrix.version,
+        "size": matrix.size,
+        "row": row,
+        "col": col,
+        "rows": matrix.names[row:row + tile],
+        "cols": matrix.names[col:col + tile],
+        "values": matrix.tile(row, col, tile)
+    })
 
 @app.route('/api/book', methods=['POST'])
 def book_trip():
     """Book a trip between two cities"""
-    data = request.get_json()
-    
-    if not data:
-        return jsonify({"error": "No data provided"}), 400
-        
-    start = data.get('departure')
-    destination = data.get('destination')
-    priority = data.get('priority', 'time')
-    
-    if not start or not destination:
-        return jsonify({"error": "Both departure and destination cities must be provided"}), 400
-        
-    if start.lower() == destination.lower():
-        return jsonify({"error": "Departure and destination cities cannot be the same"}), 400
-    
-    # Calculate the best route
-    result = transport.calculate_best_route(start, destination, priority)
-    
-    if not result:
-        return jsonify({"error": f"No route available from {start} to {destination}"}), 404
-    
-    # Format the response
-    route = result['route']
-    traffic_info = result['traffic_applied']
-    costs = result['costs']
-    durations = result['durations']
-    comfort_levels = result['comfort_levels']
-    total_cost = round(result['total_cost'], 2)
-    total_time = int(result['total_duration'])
-    
-    # Calculate comfort score
-    comfort_scores = [transport.comfort_levels[c]['comfort_score'] for c in comfort_levels]
-    avg_comfort = sum(comfort_scores) / len(comfort_scores) if comfort_scores else 0
-    
-    # Generate booking reference
-    import random
-    booking_ref = f"BK{random.randint(10000, 99999)}"
-    
-    # Generate weather warning (simulated)
-    weather_warning = None
-    if random.random() < 0.3:
-        weather_conditions = ["rain", "fog", "snow", "high winds"]
-        weather = random.choice(weather_conditions)
-        weather_warning = f"Expect {weather} along parts of this route."
-    
-    # Build segments
-    segments = []
-    for i in range(len(route) - 1):
-        segments.append({
-            "start": route[i],
-            "end": route[i+1],
-            "comfort": comfort_levels[i],
-            "cost": round(costs[i], 2),
-            "duration": int(durations[i]),
-            "traffic": traffic_info[i]
-        })
-    
-    response = {
-        "booking_ref": booking_ref,
-        "journey": {
-            "departure": start,
-            "destination": destination,
-            "priority": priority
-        },
-        "route": route,
-        "segments": segments,
-        "total_cost": total_cost,
-        "total_time": total_time,
-        "comfort_rating": round(avg_comfort, 1),
-        "weather_warning": weather_warning
-    }
-    
-    return jsonify(response)
+    payload, status = api_handlers.book_trip(transport, request.get_json(), ledger)
+    return jsonify(payload), status
+
+@app.route('/api/book/batch', methods=['POST'])
+def book_trips():
+    """Book many trips at once, sharing one route search per departure city and priority"""
+    payload, status = api_handlers.book_trips(transport, request.get_json(), ledger)
+    return jsonify(payload), status
 
 if __name__ == '__main__':
     # Create directories if they don't exist
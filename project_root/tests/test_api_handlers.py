@@ -0,0 +1,29 @@
+import pytest
+
+import api_handlers
+
+
+@pytest.fixture(scope='module')
+def transport():
+    return api_handlers.initialize_transport(seed=1)
+
+
+@pytest.mark.parametrize('body', [['Chennai', 'Mumbai'], 'Chennai', 42, True])
+def test_book_trip_rejects_non_object_body(transport, body):
+    payload, status = api_handlers.book_trip(transport, body)
+    assert status == 400
+    assert payload == {"error": "Request body must be a JSON object"}
+
+
+@pytest.mark.parametrize('body', [None, {}, [{'departure': 'Chennai', 'destination': 'Mumbai'}], 'trips', 7])
+def test_book_trips_rejects_body_without_trip_list(transport, body):
+    payload, status = api_handlers.book_trips(transport, body)
+    assert status == 400
+    assert payload == {"error": "Provide a list of trips"}
+
+
+def test_book_trip_accepts_object_body(transport):
+    payload, status = api_handlers.book_trip(transport, {'departure': 'Chennai', 'destination': 'Mumbai'})
+    assert status == 200
+    assert payload['route'][0] == 'Chennai'
+    assert payload['booking_ref'] is None
@@ -0,0 +1,29 @@
+import pytest
+
+from models.transport_system import TransportSystem
+
+
+@pytest.fixture
+def connections():
+    transport = TransportSystem()
+    for name in ('Chennai', 'Mumbai', 'Delhi'):
+        transport.add_city(name, (13.0, 80.0))
+    chennai = transport.get_city('Chennai')
+    chennai.add_connection('Mumbai', 'Economy', 100.0, 60.0)
+    chennai.add_connection('Delhi', 'Premium', 300.0, 120.0)
+    # A destination that is not registered is kept by name
+    chennai.add_connection('Atlantis', 'Standard', 50.0, 30.0)
+    return chennai.connections
+
+
+def test_connections_index_like_a_list(connections):
+    expected = [('Mumbai', 'Economy', 100.0, 60.0), ('Delhi', 'Premium', 300.0, 120.0),
+                ('Atlantis', 'Standard', 50.0, 30.0)]
+    assert [connections[i] for i in range(-3, 3)] == [expected[i] for i in range(-3, 3)]
+    assert connections[::-1] == expected[::-1]
+
+
+@pytest.mark.parametrize('index', [3, 4, -4, -7])
+def test_connections_index_out_of_range(connections, index):
+    with pytest.raises(IndexError):
+        connections[index]
@@ -0,0 +1,64 @@
+from models.route_trees import RouteTrees
+from models.traffic_model import TrafficEpoch
+from models.transport_system import TransportSystem
+from utils.network_generator import create_knn_network
+
+EPOCH = TrafficEpoch('2026-10-19', False, False)
+
+
+def make_transport(route_trees):
+    transport = TransportSystem()
+    create_knn_network(transport, 200, k=4, seed=7)
+    transport.route_trees = route_trees
+    return transport
+
+
+def query_round_robin(transport, sources, destination, rounds):
+    results = []
+    for _ in range(rounds):
+        for source in sources:
+            transport.route_cache.clear()
+            result = transport.calculate_best_route(source, destination, 'time', EPOCH)
+            # Only the route, not how the search that found it went
+            results.append({key: value for key, value in result.items() if key != 'search'})
+    return results
+
+
+def test_more_hot_sources_than_trees_do_not_thrash():
+    transport = make_transport(RouteTrees(max_trees=4, hot_after=2))
+    names = transport.city_names()
+    sources = names[:10]
+
+    results = query_round_robin(transport, sources, names[-1], rounds=20)
+
+    stats = transport.route_trees.stats()
+    assert stats['trees'] == 4
+    assert stats['built'] == 4
+    assert stats['refused'] > 0
+
+    reference = make_transport(RouteTrees(max_trees=0))
+    assert results == query_round_robin(reference, sources, names[-1], rounds=20)
+
+
+def test_hotter_source_replaces_least_used_tree():
+    transport = make_transport(RouteTrees(max_trees=2, hot_after=2))
+    names = transport.city_names()
+    query_round_robin(transport, names[:2], names[-1], rounds=3)
+
+    query_round_robin(transport, [names[5]], names[-1], rounds=5)
+
+    source_ids = {key[0] for key in transport.route_trees._trees}
+    assert transport.city_id(names[5]) in source_ids
+    assert transport.route_trees.stats()['built'] == 3
+
+
+def test_lookup_counts_are_halved():
+    transport = make_transport(RouteTrees(hot_after=100, max_lookups=8))
+    names = transport.city_names()
+
+    query_round_robin(transport, names[:3], names[-1], rounds=3)
+
+    route_trees = transport.route_trees
+    assert len(route_trees._lookups) <= 3
+    assert max(route_trees._lookups.values()) < 3
+    assert route_trees.stats()['built'] == 0
@@ -1,3 +1,11 @@
+import math
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # Batch distances fall back to pure Python
+    np = None
+
 # Create a dictionary with real distances (in kilometers) between major Indian cities
 # These are approximate road distances
 
@@ -23,22 +31,216 @@ CITY_DISTANCES = {
     ('Mumbai', 'Delhi'): 1400
 }
 
+# Approximate coordinates (latitude, longitude in degrees) of the same cities
+CITY_COORDINATES = {
+    'Coimbatore': (11.0168, 76.9558),
+    'Palakkad': (10.7867, 76.6548),
+    'Chennai': (13.0827, 80.2707),
+    'Bangalore': (12.9716, 77.5946),
+    'Mumbai': (19.0760, 72.8777),
+    'Delhi': (28.7041, 77.1025)
+}
+
+EARTH_RADIUS_KM = 6371.0
+
+# Roads are longer than the great-circle distance between two cities
+ROAD_FACTOR = 1.25
+
+# Used when a pair has neither a road distance nor coordinates
+DEFAULT_DISTANCE = 500
+
+# Symmetric distance index built once at import: every known city gets a
+# small integer ID and road distances live in a dense ID x ID table
+_CITY_IDS = {}  # interned canonical name (and seen aliases) -> city ID
+_CITY_NAMES = []  # city ID -> canonical name
+for _city in [city for pair in CITY_DISTANCES for city in pair] + list(CITY_COORDINATES):
+    if _city not in _CITY_IDS:
+        _city = sys.intern(_city)
+        _CITY_IDS[_city] = len(_CITY_NAMES)
+        _CITY_NAMES.append(_city)
+
+_DISTANCE_TABLE = [[None] * len(_CITY_NAMES) for _ in _CITY_NAMES]  # None when unknown
+for (_city1, _city2), _distance in CITY_DISTANCES.items():
+    _DISTANCE_TABLE[_CITY_IDS[_city1]][_CITY_IDS[_city2]] = _distance
+    _DISTANCE_TABLE[_CITY_IDS[_city2]][_CITY_IDS[_city1]] = _distance
+for _id in range(len(_CITY_NAMES)):
+    _DISTANCE_TABLE[_id][_id] = 0
+
+# Lookups that had to fall back to DEFAULT_DISTANCE, and the first few pairs
+_fallback_hits = 0
+_missing_pairs = set()
+MAX_MISSING_PAIRS = 100
+
+def get_coordinates(city):
+    """Get the (latitude, longitude) of a city, or None if it is unknown."""
+    return CITY_COORDINATES.get(city.strip().title())
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometers between two points given in degrees.
+
+    This never exceeds the road distance, so it is safe as a lower bound.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def city_id(city):
+    """Get the distance index ID of a city name, or None if it has no distance data."""
+    index = _CITY_IDS.get(city)
+    if index is None:
+        index = _CITY_IDS.get(city.strip().title())
+        if index is not None:
+            # Remember the alias so the next lookup skips normalizing
+            _CITY_IDS[city] = index
+    return index
+
+def get_distance_by_id(id1, id2, city1=None, city2=None):
+    """
+    Get the distance between two cities by their distance index IDs (None if unknown).
+    The names of cities without an ID are only used to report missing pairs.
+    """
+    if id1 is not None and id2 is not None:
+        distance = _DISTANCE_TABLE[id1][id2]
+        if distance is not None:
+            return distance
+    # Missing pairs are always recorded by name
+    return _fallback(city1 if id1 is None else _CITY_NAMES[id1],
+                     city2 if id2 is None else _CITY_NAMES[id2])
+
 def get_distance(city1, city2):
     """Get the distance between two cities."""
-    # Normalize city names for case-insensitive comparison
-    city1 = city1.strip().title()
-    city2 = city2.strip().title()
-    
+    id1 = city_id(city1)
+    id2 = city_id(city2)
+    if id1 is not None and id2 is not None:
+        return get_distance_by_id(id1, id2)
+
     # Check if the cities are the same
-    if city1 == city2:
+    if city1.strip().title() == city2.strip().title():
         return 0
-    
-    # Check if we have the distance in our dictionary (in either order)
-    if (city1, city2) in CITY_DISTANCES:
-        return CITY_DISTANCES[(city1, city2)]
-    elif (city2, city1) in CITY_DISTANCES:
-        return CITY_DISTANCES[(city2, city1)]
+    return _fallback(city1, city2)
+
+def _fallback(city1, city2):
+    """Count a lookup without distance data and return the default distance."""
+    # This is just a backup and should be avoided in production
+    global _fallback_hits
+    _fallback_hits += 1
+    if len(_missing_pairs) < MAX_MISSING_PAIRS:
+        _missing_pairs.add((city1, city2))
+    return DEFAULT_DISTANCE
+
+def fallback_stats():
+    """Return how many lookups fell back to DEFAULT_DISTANCE and some of the missing pairs."""
+    return {'fallback_hits': _fallback_hits, 'missing_pairs': sorted(_missing_pairs, key=str)}
+
+def reset_fallback_stats():
+    """Reset the fallback counter and the recorded missing pairs."""
+    global _fallback_hits
+    _fallback_hits = 0
+    _missing_pairs.clear()
+
+def haversine_batch(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distances in kilometers between parallel arrays of points in degrees.
+    Returns a NumPy array, or a list when NumPy is not installed.
+    """
+    if np is None:
+        return [math.nan if math.isnan(sum(point)) else haversine_km(*point)
+                for point in zip(lat1, lon1, lat2, lon2)]
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(values, dtype=np.float64))
+                              for values in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+def _resolve_cities(cities, coordinates):
+    """Return normalized names and latitude/longitude lists (NaN when unknown)."""
+    if coordinates is None:
+        coordinates = CITY_COORDINATES
+    names, latitudes, longitudes = [], [], []
+    for city in cities:
+        name = city.strip().title()
+        point = coordinates.get(city) or coordinates.get(name)
+        names.append(name)
+        latitudes.append(point[0] if point else math.nan)
+        longitudes.append(point[1] if point else math.nan)
+    return names, latitudes, longitudes
+
+def batch_distances(origins, destinations, coordinates=None, road_factor=ROAD_FACTOR):
+    """
+    Get the distances between parallel sequences of origin and destination cities.
+
+    Known road distances are used as they are; other pairs get the great-circle
+    distance times road_factor, and pairs without coordinates get DEFAULT_DISTANCE.
+    Coordinates map city names to (latitude, longitude) and default to
+    CITY_COORDINATES. Returns a NumPy array, or a list without NumPy.
+    """
+    origin_names, lat1, lon1 = _resolve_cities(origins, coordinates)
+    destination_names, lat2, lon2 = _resolve_cities(destinations, coordinates)
+    if len(origin_names) != len(destination_names):
+        raise ValueError("origins and destinations must have the same length")
+
+    distances = haversine_batch(lat1, lon1, lat2, lon2)
+    if np is not None:
+        distances = distances * road_factor
+        distances[np.isnan(distances)] = DEFAULT_DISTANCE
+    else:
+        distances = [DEFAULT_DISTANCE if math.isnan(d) else d * road_factor for d in distances]
+
+    # Road distances override the estimate; the same city is always 0
+    for i, (origin, destination) in enumerate(zip(origin_names, destination_names)):
+        if origin == destination:
+            distances[i] = 0
+        else:
+            id1, id2 = _CITY_IDS.get(origin), _CITY_IDS.get(destination)
+            if id1 is not None and id2 is not None and _DISTANCE_TABLE[id1][id2] is not None:
+                distances[i] = _DISTANCE_TABLE[id1][id2]
+    return distances
+
+def distance_matrix(cities, coordinates=None, road_factor=ROAD_FACTOR, block_size=1024):
+    """
+    Get the full matrix of distances between every pair of cities.
+
+    Uses the same rules as batch_distances. With NumPy the matrix is a float64
+    array filled a block of rows at a time (n = 10,000 takes 800 MB); without
+    it the result is a list of lists.
+    """
+    names, latitudes, longitudes = _resolve_cities(cities, coordinates)
+    n = len(names)
+
+    if np is None:
+        matrix = [[DEFAULT_DISTANCE if math.isnan(latitudes[i]) or math.isnan(latitudes[j])
+                   else haversine_km(latitudes[i], longitudes[i], latitudes[j], longitudes[j]) * road_factor
+                   for j in range(n)] for i in range(n)]
     else:
-        # Fallback to an approximation if the cities aren't in our database
-        # This is just a backup and should be avoided in production
-        return 500  # Default distance in km
\ No newline at end of file
+        latitudes = np.radians(np.array(latitudes, dtype=np.float64))
+        longitudes = np.radians(np.array(longitudes, dtype=np.float64))
+        sin_lat, cos_lat = np.sin(latitudes), np.cos(latitudes)
+        sin_lon, cos_lon = np.sin(longitudes), np.cos(longitudes)
+        matrix = np.empty((n, n))
+        for start in range(0, n, block_size):
+            rows = slice(start, start + block_size)
+            # Haversine rewritten as 1 - cos(angle) so the block needs no trigonometry
+            cos_dlon = cos_lon[rows, None] * cos_lon + sin_lon[rows, None] * sin_lon
+            a = 0.5 * (1 - sin_lat[rows, None] * sin_lat - cos_lat[rows, None] * cos_lat * cos_dlon)
+            block = 2 * EARTH_RADIUS_KM * road_factor * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+            block[np.isnan(block)] = DEFAULT_DISTANCE
+            matrix[rows] = block
+
+    # Overrides only touch the rows and columns of cities with road data
+    positions = {}  # city ID -> matrix indexes
+    for i, name in enumerate(names):
+        index = _CITY_IDS.get(name)
+        if index is not None:
+            positions.setdefault(index, []).append(i)
+    for id1, rows in positions.items():
+        for id2, columns in positions.items():
+            distance = _DISTANCE_TABLE[id1][id2]
+            if distance is not None:
+                for i in rows:
+                    for j in columns:
+                        matrix[i][j] = distance
+    for i in range(n):
+        matrix[i][i] = 0
+    return matrix
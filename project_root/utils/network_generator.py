@@ -1,34 +1,242 @@
+import math
 import random
-from utils.distance_calculator import get_distance
+from collections import defaultdict
+from utils.distance_calculator import ROAD_FACTOR, city_id, get_distance_by_id, haversine_batch
 
-def create_fully_connected_network(transport):
+# Comfort classes assigned to generated routes
+COMFORT_LEVELS = ['Economy', 'Standard', 'Premium', 'Express']
+
+# Generated routes: ₹15 per kilometer, roughly 1 minute per kilometer
+COST_PER_KM = 15
+MINUTES_PER_KM = 1
+
+# (latitude range, longitude range) that synthetic cities are placed in
+DEFAULT_BOUNDS = ((8.0, 30.0), (70.0, 88.0))
+
+def create_fully_connected_network(transport, seed=None):
     """Create a fully connected network where each city connects to every other city."""
     # Get all cities
-    cities = []
-    temp = transport.head
-    while temp:
-        cities.append(temp.name)
-        temp = temp.next_city
-    
-    # Create comfort levels
-    comfort_levels = ['Economy', 'Standard', 'Premium', 'Express']
-    
+    cities = transport.city_names()
+    rng = random.Random(seed)
+    # Resolve each city to its distance index ID once instead of per pair
+    distance_ids = [city_id(name) for name in cities]
+
     # Connect every city with every other city
+    routes = []
     for i in range(len(cities)):
         for j in range(i + 1, len(cities)):
             # Get real distance between cities (in kilometers)
-            distance = get_distance(cities[i], cities[j])
-            
-            # Calculate cost and duration based on distance
-            # Cost: ₹15 per kilometer
-            base_cost = distance * 15
-            # Duration: roughly 1 minute per kilometer
-            base_duration = distance
-            
-            # Select a random comfort level
-            comfort = random.choice(comfort_levels)
-            
-            # Add the route
-            transport.add_route(cities[i], cities[j], comfort, base_cost, base_duration)
-    
-    return transport
\ No newline at end of file
+            distance = get_distance_by_id(distance_ids[i], distance_ids[j], cities[i], cities[j])
+            routes.append(_make_route(rng, cities[i], cities[j], distance))
+
+    transport.add_routes(routes)
+    return transport
+
+
+def create_knn_network(transport, num_cities, k=4, seed=None, bounds=DEFAULT_BOUNDS, prefix="City"):
+    """Place cities at random and connect each one to its k nearest neighbours."""
+    rng = random.Random(seed)
+    names, coordinates = _add_random_cities(transport, num_cities, rng, bounds, prefix)
+    points = _project(coordinates)
+    grid = _SpatialGrid(points, _cell_size(points, k))
+
+    pairs = []
+    for i, (x, y) in enumerate(points):
+        for j in grid.nearest(x, y, k, exclude=i):
+            pairs.append((i, j))
+    _add_pair_routes(transport, rng, names, coordinates, pairs)
+    return transport
+
+
+def create_geometric_network(transport, num_cities, radius_km=None, seed=None, bounds=DEFAULT_BOUNDS,
+                             prefix="City"):
+    """
+    Place cities at random and connect every pair closer than radius_km.
+    The default radius gives an average of about six routes per city.
+    """
+    rng = random.Random(seed)
+    names, coordinates = _add_random_cities(transport, num_cities, rng, bounds, prefix)
+    points = _project(coordinates)
+    if radius_km is None:
+        radius_km = math.sqrt(6 * _area(points) / (math.pi * max(num_cities, 1)))
+    grid = _SpatialGrid(points, radius_km)
+
+    pairs = []
+    for i, (x, y) in enumerate(points):
+        for j in grid.within(x, y, radius_km):
+            # Each pair is found from both ends; keep it once
+            if j > i:
+                pairs.append((i, j))
+    _add_pair_routes(transport, rng, names, coordinates, pairs)
+    return transport
+
+
+def create_grid_network(transport, rows, cols, seed=None, bounds=DEFAULT_BOUNDS, prefix="City"):
+    """Lay cities out on a rows x cols lattice and connect horizontal and vertical neighbours."""
+    rng = random.Random(seed)
+    (lat_min, lat_max), (lon_min, lon_max) = bounds
+    lat_step = (lat_max - lat_min) / max(rows - 1, 1)
+    lon_step = (lon_max - lon_min) / max(cols - 1, 1)
+
+    names = [f"{prefix}{row}_{col}" for row in range(rows) for col in range(cols)]
+    coordinates = [(lat_min + row * lat_step, lon_min + col * lon_step)
+                   for row in range(rows) for col in range(cols)]
+    transport.add_cities(zip(names, coordinates))
+
+    pairs = []
+    for row in range(rows):
+        for col in range(cols):
+            i = row * cols + col
+            neighbours = []
+            if col + 1 < cols:
+                neighbours.append(i + 1)
+            if row + 1 < rows:
+                neighbours.append(i + cols)
+            for j in neighbours:
+                pairs.append((i, j))
+    _add_pair_routes(transport, rng, names, coordinates, pairs)
+    return transport
+
+
+def create_hub_network(transport, num_cities, num_hubs=None, spokes_per_city=1, seed=None,
+                       bounds=DEFAULT_BOUNDS, prefix="City"):
+    """
+    Place cities at random, connect the hubs to each other and every other
+    city to its spokes_per_city nearest hubs.
+    Defaults to about sqrt(num_cities) hubs, chosen at random.
+    """
+    rng = random.Random(seed)
+    names, coordinates = _add_random_cities(transport, num_cities, rng, bounds, prefix)
+    if num_hubs is None:
+        num_hubs = max(1, math.isqrt(num_cities))
+    num_hubs = min(num_hubs, num_cities)
+    hubs = rng.sample(range(num_cities), num_hubs)
+
+    pairs = []
+    for a in range(len(hubs)):
+        for b in range(a + 1, len(hubs)):
+            i, j = hubs[a], hubs[b]
+            pairs.append((i, j))
+
+    points = _project(coordinates)
+    hub_points = [points[i] for i in hubs]
+    grid = _SpatialGrid(hub_points, _cell_size(hub_points, spokes_per_city))
+    hub_set = set(hubs)
+    for i, (x, y) in enumerate(points):
+        if i in hub_set:
+            continue
+        for h in grid.nearest(x, y, spokes_per_city):
+            j = hubs[h]
+            pairs.append((i, j))
+    _add_pair_routes(transport, rng, names, coordinates, pairs)
+    return transport
+
+
+def _make_route(rng, start, end, distance):
+    """Build an add_routes tuple for a route of the given length in kilometers."""
+    return (start, end, rng.choice(COMFORT_LEVELS), distance * COST_PER_KM, distance * MINUTES_PER_KM)
+
+
+def _add_pair_routes(transport, rng, names, coordinates, pairs):
+    """Add routes for (i, j) index pairs, measuring every pair in one batch."""
+    if not pairs:
+        return
+    origins = [coordinates[i] for i, _ in pairs]
+    destinations = [coordinates[j] for _, j in pairs]
+    distances = haversine_batch([lat for lat, _ in origins], [lon for _, lon in origins],
+                                [lat for lat, _ in destinations], [lon for _, lon in destinations])
+    transport.add_routes(_make_route(rng, names[i], names[j], float(distance) * ROAD_FACTOR)
+                         for (i, j), distance in zip(pairs, distances))
+
+
+def _add_random_cities(transport, num_cities, rng, bounds, prefix):
+    """Add num_cities uniformly placed cities; returns their names and coordinates."""
+    (lat_min, lat_max), (lon_min, lon_max) = bounds
+    names = [f"{prefix}{i}" for i in range(num_cities)]
+    coordinates = [(rng.uniform(lat_min, lat_max), rng.uniform(lon_min, lon_max)) for _ in range(num_cities)]
+    transport.add_cities(zip(names, coordinates))
+    return names, coordinates
+
+
+def _project(coordinates):
+    """Project coordinates onto a local plane in kilometers (equirectangular)."""
+    if not coordinates:
+        return []
+    mean_lat = sum(lat for lat, _ in coordinates) / len(coordinates)
+    km_per_lon = 111.32 * math.cos(math.radians(mean_lat))
+    return [(lon * km_per_lon, lat * 110.57) for lat, lon in coordinates]
+
+
+def _area(points):
+    """Area in square kilometers of the bounding box of the points."""
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    return max((max(xs) - min(xs)) * (max(ys) - min(ys)), 1.0)
+
+
+def _cell_size(points, per_cell):
+    """Cell size that puts about per_cell points in each grid cell."""
+    if not points:
+        return 1.0
+    return math.sqrt(_area(points) * max(per_cell, 1) / len(points))
+
+
+class _SpatialGrid:
+    """Buckets points into square cells so neighbour queries only look nearby."""
+
+    def __init__(self, points, cell_size):
+        self.points = points
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)  # (cell x, cell y) -> point indexes
+        for i, (x, y) in enumerate(points):
+            self.cells[self._cell(x, y)].append(i)
+
+        # Rings beyond this cover no further cells
+        if self.cells:
+            xs = [cx for cx, _ in self.cells]
+            ys = [cy for _, cy in self.cells]
+            self.max_ring = max(max(xs) - min(xs), max(ys) - min(ys)) + 1
+        else:
+            self.max_ring = 0
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def within(self, x, y, radius):
+        """Yield the indexes of points within radius of (x, y)."""
+        cx, cy = self._cell(x, y)
+        reach = int(radius // self.cell_size) + 1
+        limit = radius * radius
+        points = self.points
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for j in self.cells.get((cx + dx, cy + dy), ()):
+                    px, py = points[j]
+                    if (px - x) ** 2 + (py - y) ** 2 <= limit:
+                        yield j
+
+    def nearest(self, x, y, k, exclude=None):
+        """Return the indexes of the k points nearest to (x, y), closest first."""
+        cx, cy = self._cell(x, y)
+        points = self.points
+        found = []  # (squared distance, index)
+        ring = 0
+        while ring <= self.max_ring:
+            # Visit only the cells on the border of the current square ring
+            for dx in range(-ring, ring + 1):
+                step = 1 if abs(dx) == ring else 2 * ring
+                for dy in range(-ring, ring + 1, step or 1):
+                    for j in self.cells.get((cx + dx, cy + dy), ()):
+                        if j != exclude:
+                            px, py = points[j]
+                            found.append(((px - x) ** 2 + (py - y) ** 2, j))
+
+            # Points in later rings are at least ring * cell_size away
+            if len(found) >= k:
+                found.sort()
+                del found[k:]
+                if found[-1][0] <= (ring * self.cell_size) ** 2:
+                    break
+            ring += 1
+        found.sort()
+        return [j for _, j in found[:k]]
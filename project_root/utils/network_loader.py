@@ -0,0 +1,216 @@
+import csv
+import json
+import math
+import os
+
+# Fields every record must provide
+CITY_FIELDS = ('name',)
+ROUTE_FIELDS = ('start', 'end', 'comfort', 'cost', 'duration')
+
+# Only the first few rejected rows are kept in the report
+MAX_REPORTED_ERRORS = 100
+
+
+class LoadReport:
+    """Counts of what a bulk load inserted, skipped and rejected."""
+
+    def __init__(self):
+        self.cities_added = 0
+        self.cities_duplicate = 0
+        self.routes_added = 0
+        self.routes_duplicate = 0
+        self.rows_rejected = 0
+        self.errors = []  # (file, line, message) for the first rejected rows
+
+    def reject(self, path, line, message):
+        self.rows_rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((path, line, message))
+
+    def as_dict(self):
+        return {
+            'cities_added': self.cities_added,
+            'cities_duplicate': self.cities_duplicate,
+            'routes_added': self.routes_added,
+            'routes_duplicate': self.routes_duplicate,
+            'rows_rejected': self.rows_rejected,
+            'errors': [{'file': path, 'line': line, 'message': message}
+                       for path, line, message in self.errors]
+        }
+
+
+def iter_records(path):
+    """
+    Stream (line number, record dict) pairs from a CSV or NDJSON file.
+    The format is picked from the extension: .csv, or .ndjson/.jsonl/.json.
+    Lines that are not valid JSON yield (line number, None).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8') as handle:
+            reader = csv.DictReader(handle)
+            for record in reader:
+                yield reader.line_num, record
+    elif extension in ('.ndjson', '.jsonl', '.json'):
+        with open(path, encoding='utf-8') as handle:
+            for line_number, line in enumerate(handle, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield line_number, record if isinstance(record, dict) else None
+    else:
+        raise ValueError(f"Unsupported network file format: {path}")
+
+
+def _number(value):
+    """Parse a finite, non-negative number, or return None."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number) or number < 0:
+        return None
+    return number
+
+
+def _text(value):
+    """Return a stripped non-empty string, or None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def parse_city(record):
+    """Validate a city record; returns ((name, coordinates), None) or (None, error)."""
+    name = _text(record.get('name'))
+    if name is None:
+        return None, "missing city name"
+
+    latitude = record.get('latitude', record.get('lat'))
+    longitude = record.get('longitude', record.get('lon'))
+    if latitude in (None, '') and longitude in (None, ''):
+        return (name, None), None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None, f"invalid coordinates for {name}"
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None, f"coordinates out of range for {name}"
+    return (name, (latitude, longitude)), None
+
+
+def parse_route(record, comfort_levels=None):
+    """
+    Validate a route record; returns ((start, end, comfort, cost, duration), None) or (None, error).
+    With comfort_levels, the comfort class must be one of its keys.
+    """
+    start = _text(record.get('start'))
+    end = _text(record.get('end'))
+    comfort = _text(record.get('comfort'))
+    if start is None or end is None:
+        return None, "missing start or end city"
+    if comfort is None:
+        return None, "missing comfort class"
+    if comfort_levels is not None and comfort not in comfort_levels:
+        return None, f"unknown comfort class {comfort}"
+
+    cost = _number(record.get('cost'))
+    duration = _number(record.get('duration'))
+    if cost is None or duration is None:
+        return None, "cost and duration must be non-negative numbers"
+    return (start, end, comfort, cost, duration), None
+
+
+def load_cities(transport, path, report=None):
+    """Stream cities from a file into the transport system in one batch."""
+    report = report or LoadReport()
+    seen = set()  # Normalized names already read from this file
+    accepted = 0
+
+    def valid_cities():
+        nonlocal accepted
+        for line_number, record in iter_records(path):
+            if record is None:
+                report.reject(path, line_number, "malformed record")
+                continue
+            city, error = parse_city(record)
+            if error:
+                report.reject(path, line_number, error)
+                continue
+
+            key = transport.registry.normalize(city[0])
+            if key in seen:
+                report.cities_duplicate += 1
+                continue
+            seen.add(key)
+            accepted += 1
+            yield city
+
+    added = transport.add_cities(valid_cities())
+    report.cities_added += added
+    report.cities_duplicate += accepted - added
+    return report
+
+
+def load_routes(transport, path, report=None):
+    """Stream routes from a file into the transport system in one batch."""
+    report = report or LoadReport()
+    seen = set()  # Unordered city ID pairs already read from this file
+    accepted = 0
+    id_of = transport.registry.id_of
+
+    def valid_routes():
+        nonlocal accepted
+        for line_number, record in iter_records(path):
+            if record is None:
+                report.reject(path, line_number, "malformed record")
+                continue
+            route, error = parse_route(record, transport.comfort_levels)
+            if error:
+                report.reject(path, line_number, error)
+                continue
+
+            start_id = id_of(route[0])
+            end_id = id_of(route[1])
+            if start_id is None or end_id is None:
+                report.reject(path, line_number, f"unknown city in route {route[0]} - {route[1]}")
+                continue
+            if start_id == end_id:
+                report.reject(path, line_number, f"route from {route[0]} to itself")
+                continue
+
+            # Routes are bidirectional, so A-B and B-A are the same route
+            key = (start_id, end_id) if start_id < end_id else (end_id, start_id)
+            if key in seen:
+                report.routes_duplicate += 1
+                continue
+            seen.add(key)
+            accepted += 1
+            yield route
+
+    added = transport.add_routes(valid_routes())
+    report.routes_added += added
+    report.routes_duplicate += accepted - added
+    return report
+
+
+def load_network(transport, cities_path=None, routes_path=None):
+    """
+    Bulk load a network from a city file and a route file (CSV or NDJSON).
+
+    City records have name and optional latitude/longitude; route records have
+    start, end, comfort, cost and duration. Files are streamed record by record
+    into a single batch insert per file: invalid rows are skipped and reported,
+    duplicates are counted, and the network version is bumped once per file.
+    Returns a LoadReport.
+    """
+    report = LoadReport()
+    if cities_path:
+        load_cities(transport, cities_path, report)
+    if routes_path:
+        load_routes(transport, routes_path, report)
+    return report
@@ -0,0 +1,352 @@
+"""Versioned binary snapshot files of a built transport network.
+
+A snapshot holds the cities, the CSR edge arrays with their final costs and
+durations, the comfort classes and the traffic seed, so a restored network
+answers exactly like the one that was saved. The file is a small header, a
+section table and the section payloads:
+
+    header         magic, format version, section count
+    section table  one (name, offset, size, array typecode) entry per section
+    sections       raw little-endian arrays, each starting on a 64-byte boundary
+
+Aligned, fixed-type sections can be copied into arrays with one call each
+(load_snapshot), or read in place through a memory map (open_graph), which
+lets every process that maps the same file share one copy of the graph.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+
+from models.city import COMFORT_CLASSES, comfort_code
+from models.graph_snapshot import GraphSnapshot
+from models.transport_system import TransportSystem
+
+MAGIC = b'TRNSNAP\0'
+FORMAT_VERSION = 1
+SECTION_ALIGNMENT = 64
+
+_HEADER = struct.Struct('<8sII')  # magic, format version, section count
+_SECTION = struct.Struct('<8sQQc7x')  # name, offset, size in bytes, array typecode
+
+# Array typecode of every network section
+NETWORK_SECTIONS = {
+    'names': 'B',  # UTF-8 city names, back to back
+    'name_off': 'q',  # Byte offset of each name, plus the end offset
+    'offsets': 'q',
+    'targets': 'i',
+    'costs': 'd',
+    'duration': 'd',
+    'comfort': 'B',
+    'lat': 'd',
+    'lon': 'd'
+}
+
+# Optional sections, ignored by readers that do not use them
+INDEX_SECTIONS = {
+    'name_idx': 'i'  # City IDs ordered by casefolded name, for binary search
+}
+
+# Sections of the per-epoch traffic files written next to a mapped snapshot
+TRAFFIC_SECTIONS = {
+    'levels': 'B',  # TRAFFIC_LEVELS index of every edge
+    'factors': 'd'  # Traffic factor of every edge
+}
+
+
+def write_sections(path, sections):
+    """
+    Write (name, typecode, data) sections to a snapshot file. The file is
+    written next to its destination and renamed over it, so readers never
+    see a partial snapshot.
+    """
+    payloads = []
+    for name, typecode, data in sections:
+        if isinstance(data, array):
+            if sys.byteorder != 'little':
+                data = array(typecode, data)
+                data.byteswap()
+            data = data.tobytes()
+        payloads.append((name.encode('ascii'), typecode.encode('ascii'), data))
+
+    table = []
+    offset = _HEADER.size + _SECTION.size * len(payloads)
+    for name, typecode, data in payloads:
+        offset = _align(offset)
+        table.append(_SECTION.pack(name, offset, len(data), typecode))
+        offset += len(data)
+
+    # Several processes may write the same file at once, so each uses its own temp file
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as handle:
+        handle.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(payloads)))
+        handle.write(b''.join(table))
+        for entry, (_, _, data) in zip(table, payloads):
+            handle.write(b'\0' * (_SECTION.unpack(entry)[1] - handle.tell()))
+            handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+
+
+def read_sections(buffer):
+    """
+    Parse the section table of a snapshot held in a bytes-like object or a
+    memory map. Returns {name: (typecode, memoryview)} without copying.
+    """
+    view = memoryview(buffer)
+    if len(view) < _HEADER.size:
+        raise ValueError("File is too short to be a network snapshot")
+    magic, version, count = _HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a network snapshot file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {version}")
+
+    sections = {}
+    for index in range(count):
+        name, offset, size, typecode = _SECTION.unpack_from(view, _HEADER.size + index * _SECTION.size)
+        if offset + size > len(view):
+            raise ValueError("Snapshot file is truncated")
+        sections[name.rstrip(b'\0').decode('ascii')] = (typecode.decode('ascii'), view[offset:offset + size])
+    return sections
+
+
+def section_view(sections, name, expected=None):
+    """Return a section as a typed memoryview without copying, optionally checking the typecode."""
+    if name not in sections:
+        raise ValueError(f"Snapshot has no '{name}' section")
+    typecode, view = sections[name]
+    if expected is not None and typecode != expected:
+        raise ValueError(f"Snapshot section '{name}' has type '{typecode}', expected '{expected}'")
+    return view.cast(typecode)
+
+
+def section_array(sections, name, expected=None):
+    """Copy a section into an array of its typecode, optionally checking the typecode."""
+    view = section_view(sections, name, expected)
+    values = array(view.format)
+    values.frombytes(view.cast('B'))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def save_snapshot(transport, path):
+    """Save the current network of a transport system to a snapshot file."""
+    graph = transport.snapshot()
+    encoded = [name.encode('utf-8') for name in graph.names]
+    name_offsets = array('q', [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+
+    meta = {
+        'version': graph.version,
+        'num_cities': graph.num_cities,
+        'num_edges': graph.num_edges,
+        'comfort_classes': COMFORT_CLASSES,
+        'comfort_levels': transport.comfort_levels,
+        'traffic_seed': transport.traffic.seed
+    }
+    name_index = array('i', sorted(range(graph.num_cities), key=lambda city_id: graph.names[city_id].casefold()))
+    write_sections(path, [
+        ('meta', 'B', json.dumps(meta).encode('utf-8')),
+        ('names', 'B', b''.join(encoded)),
+        ('name_off', 'q', name_offsets),
+        ('offsets', 'q', graph.offsets),
+        ('targets', 'i', graph.targets),
+        ('costs', 'd', graph.costs),
+        ('duration', 'd', graph.durations),
+        ('comfort', 'B', graph.comfort_codes),
+        ('lat', 'd', graph.latitudes),
+        ('lon', 'd', graph.longitudes),
+        ('name_idx', 'i', name_index)
+    ])
+
+
+def load_snapshot(path):
+    """Load a snapshot file into a new, fully usable TransportSystem."""
+    with open(path, 'rb') as handle:
+        sections = read_sections(handle.read())
+    meta = read_meta(sections)
+
+    arrays = {name: section_array(sections, name, typecode) for name, typecode in NETWORK_SECTIONS.items()}
+    blob = arrays['names'].tobytes()
+    name_offsets = arrays['name_off']
+    names = [blob[name_offsets[i]:name_offsets[i + 1]].decode('utf-8') for i in range(meta['num_cities'])]
+    if len(arrays['offsets']) != meta['num_cities'] + 1 or len(arrays['targets']) != meta['num_edges']:
+        raise ValueError("Snapshot arrays do not match its metadata")
+
+    comfort_codes = remap_comfort_codes(arrays['comfort'], meta['comfort_classes'])
+    price_factors, comfort_scores = GraphSnapshot.comfort_tables(meta['comfort_levels'])
+    graph = GraphSnapshot(names, arrays['offsets'], arrays['targets'], arrays['costs'], arrays['duration'],
+                          comfort_codes, price_factors, comfort_scores, arrays['lat'], arrays['lon'],
+                          meta['version'])
+    return TransportSystem.restore(graph, meta['traffic_seed'], meta['comfort_levels'])
+
+
+def open_graph(path):
+    """Map a snapshot file read-only as a GraphSnapshot without loading it."""
+    return MappedGraph(path)
+
+
+class MappedGraph(GraphSnapshot):
+    """GraphSnapshot whose arrays are read in place from a memory-mapped snapshot file.
+
+    Opening one parses only the header and the JSON metadata; the CSR arrays
+    are memoryviews over the map and city names are decoded on access, with
+    name lookups binary searching the sorted name index. Processes mapping
+    the same file share its pages through the OS page cache. It pickles as
+    its path, so a worker process that receives one maps the file itself.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise ValueError("Memory-mapped snapshots need a little-endian host")
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        sections = read_sections(self._map)
+        meta = read_meta(sections)
+        self.comfort_levels = meta['comfort_levels']
+        self.traffic_seed = meta['traffic_seed']
+
+        views = {name: section_view(sections, name, typecode) for name, typecode in NETWORK_SECTIONS.items()}
+        price_factors, comfort_scores = GraphSnapshot.comfort_tables(self.comfort_levels)
+        super().__init__(NameTable(views['names'], views['name_off']), views['offsets'], views['targets'],
+                         views['costs'], views['duration'],
+                         remap_comfort_codes(views['comfort'], meta['comfort_classes']),
+                         price_factors, comfort_scores, views['lat'], views['lon'], meta['version'])
+        self._name_index = (section_view(sections, 'name_idx', INDEX_SECTIONS['name_idx'])
+                            if 'name_idx' in sections else None)
+
+    def city_id(self, name):
+        """Return the ID of a city by name (case-insensitive), or None."""
+        if self._name_index is None:
+            # Snapshots written without the index fall back to a hash index
+            return super().city_id(name)
+        key = name.casefold()
+        index = self._name_index
+        low, high = 0, len(index)
+        while low < high:
+            middle = (low + high) // 2
+            if self.names[index[middle]].casefold() < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(index) and self.names[index[low]].casefold() == key:
+            return index[low]
+        return None
+
+    def shared_traffic(self, traffic, epoch):
+        """
+        Return (levels, factors) for an epoch, mapped from a traffic file next
+        to the snapshot. The first process to need an epoch computes and saves
+        it; the others map the same file, so the per-edge traffic, like the
+        graph, exists once per host. Falls back to private arrays if the
+        file cannot be written.
+        """
+        path = traffic_path(self.path, traffic.seed, epoch)
+        arrays = self._map_traffic(path, traffic.seed, epoch)
+        if arrays is not None:
+            return arrays
+
+        levels, factors = traffic.compute_edge_traffic(self, epoch)
+        meta = {'version': self.version, 'num_edges': self.num_edges, 'traffic_seed': traffic.seed,
+                'epoch': list(epoch)}
+        try:
+            write_sections(path, [
+                ('meta', 'B', json.dumps(meta).encode('utf-8')),
+                ('levels', 'B', levels),
+                ('factors', 'd', factors)
+            ])
+        except OSError:
+            return levels, factors
+        # Traffic files of earlier days are never read again; processes whose
+        # clock already moved on may still use later ones. ISO days sort by date
+        prefix = traffic_path(self.path, traffic.seed, '')
+        for stale in glob.glob(traffic_path(self.path, traffic.seed, None)):
+            if stale[len(prefix):len(prefix) + len(epoch.day)] < epoch.day:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+        return self._map_traffic(path, traffic.seed, epoch) or (levels, factors)
+
+    def _map_traffic(self, path, seed, epoch):
+        """Map a traffic file written for this graph and epoch, or return None if there is no valid one."""
+        try:
+            with open(path, 'rb') as handle:
+                traffic_map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            sections = read_sections(traffic_map)
+            meta = read_meta(sections)
+            if meta != {'version': self.version, 'num_edges': self.num_edges, 'traffic_seed': seed,
+                        'epoch': list(epoch)}:
+                return None
+            # The views keep the map open for as long as they are used
+            return tuple(section_view(sections, name, typecode) for name, typecode in TRAFFIC_SECTIONS.items())
+        except ValueError:
+            return None
+
+    def __reduce__(self):
+        return (MappedGraph, (self.path,))
+
+
+class NameTable(Sequence):
+    """City names decoded on access from a UTF-8 blob and its offsets."""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]]).decode('utf-8')
+
+
+def read_meta(sections):
+    """Decode the JSON metadata section."""
+    if 'meta' not in sections:
+        raise ValueError("Snapshot has no 'meta' section")
+    return json.loads(bytes(sections['meta'][1]))
+
+
+def traffic_path(snapshot_path, seed, epoch):
+    """
+    Return the traffic file of a snapshot for a traffic seed and epoch. An epoch
+    of None gives a glob pattern for all epochs, and a day string one for that day.
+    """
+    if epoch is None:
+        return f"{snapshot_path}.traffic-{seed}-*"
+    if isinstance(epoch, str):
+        return f"{snapshot_path}.traffic-{seed}-{epoch}"
+    return f"{snapshot_path}.traffic-{seed}-{epoch.day}-{int(epoch.weekend)}{int(epoch.rush_hour)}"
+
+
+def remap_comfort_codes(codes, saved_classes):
+    """Translate comfort codes saved against another COMFORT_CLASSES order to this process's codes."""
+    mapping = [comfort_code(comfort) for comfort in saved_classes]
+    if mapping == list(range(len(mapping))):
+        return codes
+    table = bytearray(range(256))
+    for saved, current in enumerate(mapping):
+        table[saved] = current
+    return array('B', codes.tobytes().translate(table))
+
+
+def _align(offset):
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT